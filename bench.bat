@@ -0,0 +1,4 @@
+cd src
+python "benchmark.py" --compare
+cd ..
+pause
\ No newline at end of file
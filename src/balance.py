@@ -0,0 +1,120 @@
+"""
+Bulk balance runs: the bot plays whole games headlessly on every CPU core.
+
+    python balance.py [--games N] [--workers N] [--max-turns N] [--seed N] [--out DIR]
+    python balance.py --report [--out DIR]
+
+Game i is played with seed `seed + i` and class i modulo the number of
+classes. Results are appended, one game at a time, to a column file in
+`out`; running the same command again skips the games already in it, so an
+interrupted run resumes where it stopped.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from common.column_file import ColumnFile
+
+RESULTS_DIR = '../balance'
+GAMES = 1000
+MAX_TURNS = 5000
+SEED = 1
+
+# The bot did not die, killed the Troll King, died.
+ALIVE, WON, DIED = 0, 1, 2
+
+COLUMNS = [
+    ('game', 'u4'),
+    ('seed', 'u4'),
+    ('game_class', str),
+    ('outcome', 'u1'),
+    ('turns', 'u4'),
+    ('deepest_level', 'u1'),
+    ('death_level', 'u1'),
+    ('killer', str),
+    ('kills', 'u2'),
+    ('player_level', 'u1'),
+    ('seconds', 'f4'),
+]
+
+
+def play(job):
+    """
+    Play one game in a worker process.
+    """
+    index, seed, class_name, max_turns = job
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from common.bot import BotInput
+    from common.game_class import Game
+    from mobs.player import Classes
+
+    start = time.perf_counter()
+    game = Game(False, headless=True, input_source=BotInput(max_turns=max_turns), game_class=Classes[class_name],
+                seed=seed)
+    game.play()
+    stats = game.stats
+    outcome = WON if stats.boss_killed else DIED if stats.death_level is not None else ALIVE
+    return {
+        'game': index,
+        'seed': seed,
+        'game_class': class_name,
+        'outcome': outcome,
+        'turns': game.turns,
+        'deepest_level': stats.deepest_level,
+        'death_level': stats.death_level or 0,
+        'killer': stats.player_killer,
+        'kills': game.player.kills,
+        'player_level': game.player.level,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def report(table):
+    games = len(table['game'])
+    print('%d games' % games)
+    if not games:
+        return
+    for class_name in sorted(set(table['game_class'])):
+        rows = table['game_class'] == class_name
+        died = rows & (table['outcome'] == DIED)
+        print('\n%s: %d games, %.1f%% died, %.1f%% won, deepest level %.1f, %.0f turns, %.1f kills' % (
+            class_name.lower(), rows.sum(), died.sum() / rows.sum() * 100,
+            (rows & (table['outcome'] == WON)).sum() / rows.sum() * 100,
+            table['deepest_level'][rows].mean(), table['turns'][rows].mean(), table['kills'][rows].mean()))
+        if died.any():
+            levels = Counter(table['death_level'][died].tolist())
+            print('  deaths by level: %s' % ', '.join('%d: %d' % item for item in sorted(levels.items())))
+            killers = Counter(table['killer'][died].tolist())
+            print('  killers: %s' % ', '.join('%s %d' % item for item in killers.most_common(8)))
+
+
+if __name__ == '__main__':
+    from mobs.player import Classes
+
+    parser = argparse.ArgumentParser(description='Play many games with the bot and gather the results.')
+    parser.add_argument('--games', type=int, default=GAMES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS)
+    parser.add_argument('--seed', type=int, default=SEED, help='seed of the first game')
+    parser.add_argument('--out', default=RESULTS_DIR)
+    parser.add_argument('--report', action='store_true', help='only print the results gathered so far')
+    args = parser.parse_args()
+
+    results = ColumnFile(args.out, COLUMNS)
+    if not args.report:
+        classes = [game_class.name for game_class in Classes]
+        done = set(results.read()['game'].tolist())
+        jobs = [(i, (args.seed + i) % 2 ** 32, classes[i % len(classes)], args.max_turns)
+                for i in range(args.games) if i not in done]
+        print('%d games to play, %d already done' % (len(jobs), len(done)))
+        start = time.perf_counter()
+        with Pool(args.workers) as pool:
+            for n, row in enumerate(pool.imap_unordered(play, jobs), 1):
+                results.append(row)
+                if n % 50 == 0 or n == len(jobs):
+                    elapsed = time.perf_counter() - start
+                    print('%d/%d games, %.1f games/s' % (n, len(jobs), n / elapsed))
+    report(results.read())
+    results.close()
@@ -0,0 +1,234 @@
+"""
+Benchmarks of the hot paths, on fixed seeds:
+
+    python benchmark.py [--rounds N] [--only NAME] [--json PATH]
+                        [--save BASELINE] [--compare BASELINE] [--threshold RATIO]
+
+Every benchmark is run `rounds` times; the median and the minimum time per
+operation are reported, in microseconds. --save stores the results as a
+baseline; --compare prints them next to a baseline and exits with status 1
+when a median got slower than `threshold` times the baseline's.
+
+Baselines only make sense on the machine they were recorded on, so none is
+kept in the repository (see bench.bat).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from common.game_class import Game
+from common.game import init, draw_all, MAX_DLEVEL
+from common.input import ScriptedInput
+from common.rng import reseed, stream
+from common.utils import random_by_level
+from utils.random_help import ChoiceBox, weighted_choice, weighted_sample
+from maps import level_cache
+from maps.generator import MapGenerator
+from maps.map import Map
+from mobs.damage import Damage
+from mobs.mob import Mob
+from mobs.monster import Monster
+from mobs.player import Classes
+
+SEED = 1234
+ROUNDS = 20
+THRESHOLD = 1.25
+BASELINE_FILE = '../bench/baseline.json'
+
+
+def measure(run, setup=None, rounds=ROUNDS, ops=1):
+    """
+    :return: seconds per operation of each round. `setup` is not timed; its
+        result is passed to `run`.
+    """
+    times = []
+    for i in range(rounds + 1):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        if i:  # the first round warms up
+            times.append(elapsed / ops)
+    return times
+
+
+def new_game(headless=True):
+    game = Game(False, headless=headless, input_source=ScriptedInput(()), game_class=Classes.FIGHTER, seed=SEED)
+    init(game)
+    game.start()
+    game.levels.shutdown()
+    return game
+
+
+def bench_generate(rounds):
+    results = {}
+    for level in range(1, MAX_DLEVEL + 1):
+        reseed(SEED)
+
+        def generate(state, level=level):
+            with stream('mapgen', level):
+                MapGenerator().generate(level)
+        results['generate[%d]' % level] = measure(generate, rounds=rounds)
+    return results
+
+
+def bench_populate(rounds):
+    reseed(SEED)
+    return {'populate': measure(lambda m: m.populate_level(), lambda: Map(1, populate=False), rounds)}
+
+
+def bench_fov(rounds):
+    game = new_game()
+    player, m = game.player, game.map
+    cells = list(zip(*m.tiles.walkable.nonzero()))
+    cells = cells[::max(1, len(cells) // 200)]
+    steps = iter(cells * (rounds + 1))
+
+    def step():
+        x, y = next(steps)
+        if not m.tiles.mob[x, y]:
+            Mob.move(player, x, y)
+
+    return {'recalc_fov': measure(lambda state: m.recalc_fov(), step, rounds * 10)}
+
+
+def bench_turns(rounds, monsters=(10, 50)):
+    results = {}
+    for n in monsters:
+        game = new_game()
+        player, m = game.player, game.map
+        with stream('population', 1):
+            while len(m.mobs) < n + 1:
+                m.place_monsters(random_by_level(1, Monster.ALL), not_seen=True)
+        turn = [0]
+
+        def keep_alive():
+            if not player.is_alive:
+                player.resurrect()
+            player.life.fill()
+
+        def do_turns(state, turns=20):
+            for i in range(turns):
+                m.do_turn(turn[0])
+                turn[0] += 1
+        results['do_turn[%d]' % n] = measure(do_turns, keep_alive, rounds, ops=20)
+    return results
+
+
+def bench_damage(rounds):
+    game = new_game()
+    player = game.player
+    reseed(SEED)
+    monster = random_by_level(1, Monster.ALL)()
+
+    def calculate(state, n=1000):
+        for i in range(n):
+            Damage.calculate(player, monster)
+            Damage.calculate(monster, player)
+    return {'damage': measure(calculate, rounds=rounds, ops=2000)}
+
+
+def bench_draw(rounds):
+    from graphics.window import Window
+    new_game(headless=False)
+    window = Window.instance()
+    return {
+        'draw_all': measure(lambda state: draw_all(), rounds=rounds),
+        'draw_all[repaint]': measure(lambda state: draw_all(), window.repaint, rounds),
+    }
+
+
+def bench_sampling(rounds, sizes=(60, 1000)):
+    results = {}
+    for n in sizes:
+        reseed(SEED)
+        boxes = [ChoiceBox(i, (8, 4, 1)[i % 3]) for i in range(n)]
+
+        def choose(state, times=100):
+            for i in range(times):
+                weighted_choice(boxes)
+
+        def sample(state, times=100):
+            for i in range(times):
+                weighted_sample(boxes, 10)
+        results['weighted_choice[%d]' % n] = measure(choose, rounds=rounds, ops=100)
+        results['weighted_sample[%d]' % n] = measure(sample, rounds=rounds, ops=100)
+    return results
+
+
+BENCHMARKS = [bench_generate, bench_populate, bench_fov, bench_turns, bench_damage, bench_sampling, bench_draw]
+
+
+def run(rounds=ROUNDS, only=None):
+    level_cache.configure(None)
+    results = {}
+    for bench in BENCHMARKS:
+        if only and only not in bench.__name__:
+            continue
+        for name, times in bench(rounds).items():
+            results[name] = {
+                'median_us': statistics.median(times) * 1e6,
+                'min_us': min(times) * 1e6,
+                'rounds': len(times),
+            }
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': SEED,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """
+    :return: the names of the benchmarks that got slower than the baseline.
+    """
+    slower = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print('%-24s %10.1f us  (new)' % (name, result['median_us']))
+            continue
+        ratio = result['median_us'] / base['median_us']
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        print('%-24s %10.1f us  %10.1f us  x%.2f%s' % (name, result['median_us'], base['median_us'], ratio, flag))
+    return slower
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths.')
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--only', help='run the benchmarks whose name contains this')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--save', nargs='?', const=BASELINE_FILE, help='store the results as the baseline')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, help='compare with the baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    report = run(args.rounds, args.only)
+    for path in (args.json, args.save):
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print('No baseline at %s, run with --save first.' % args.compare)
+            sys.exit(0)
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slower = compare(report, baseline, args.threshold)
+        sys.exit(1 if slower else 0)
+    for name, result in report['results'].items():
+        print('%-24s %10.1f us  (min %.1f us)' % (name, result['median_us'], result['min_us']))
@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+import numpy as np
+import pygame
+import tcod as T
+
+import common.game
+from common.game import WALK_KEYS, Quit
+from common.input import ScriptedInput
+from common.rng import in_stream
+from common.utils import ALL_DIRS, choice, dist
+
+
+def walk_key(dx, dy):
+    for keys, cmd in WALK_KEYS:
+        if cmd == ('walk', (dx, dy)):
+            return keys[0]
+
+
+class BotInput(ScriptedInput):
+    """
+    Plays the game by itself, for headless runs.
+
+    It attacks monsters next to it, climbs the stairs when it stands on them
+    and otherwise walks towards the stairs up (or, on levels without them,
+    towards the nearest monster). Scenes are confirmed with [ENTER].
+    The game is quit after `max_turns` turns.
+    """
+
+    def __init__(self, max_turns: Optional[int] = None):
+        super().__init__(())
+        self.max_turns = max_turns
+
+    def readkey(self) -> int:
+        return pygame.K_RETURN
+
+    def prompt(self, choices: List[int]) -> int:
+        return pygame.K_RETURN if pygame.K_RETURN in choices else choices[0]
+
+    def anykey(self) -> None:
+        pass
+
+    # The bot's own choices must not shift the streams of the game: a game
+    # it played is replayed from its journal without it.
+    @in_stream('bot')
+    def next_key(self) -> int:
+        game = common.game.GAME
+        if self.max_turns is not None and game.turns >= self.max_turns:
+            raise Quit()
+        player, m = game.player, game.map
+
+        for dx, dy in ALL_DIRS:
+            x, y = player.x + dx, player.y + dy
+            if m.in_map(x, y) and m.tiles.mob[x, y]:
+                return walk_key(dx, dy)
+
+        from maps.tiles import StairUpTile
+        if isinstance(player.tile, StairUpTile):
+            return pygame.K_COMMA
+
+        target = self.target(m, player)
+        if target:
+            path = T.path.AStar(m.tiles.walkable.astype(np.int8)).get_path(player.x, player.y, *target)
+            if path:
+                x, y = path[0]
+                return walk_key(x - player.x, y - player.y)
+        return walk_key(*choice(ALL_DIRS))
+
+    def target(self, m, player):
+        from maps.tiles import StairUpTile
+        stairs = m.tiles.find(StairUpTile)
+        if stairs:
+            return stairs
+        mobs = [mob for mob in m.mobs if mob is not player]
+        if mobs:
+            mob = min(mobs, key=lambda mob: dist(mob.x, mob.y, player.x, player.y))
+            return mob.x, mob.y
+        return None
@@ -0,0 +1,99 @@
+"""
+Append-only columnar tables.
+
+A table is a directory with one raw little-endian file per column
+(<name>.bin) and, for text columns, a dictionary file (<name>.txt, one
+value per line) the column stores indices into. Rows are appended one
+column after the other, so after an interruption the columns may differ in
+length; opening the table cuts them back to the rows that are complete.
+"""
+import os
+
+import numpy as np
+
+
+class ColumnFile(object):
+    def __init__(self, path, columns):
+        """
+        :param columns: [(name, dtype)], with dtype `str` for text columns.
+        """
+        self.path = path
+        self.columns = columns
+        self.words = {}
+        os.makedirs(path, exist_ok=True)
+        for name, dtype in columns:
+            if dtype is str:
+                self.words[name] = self.__read_words(name)
+        self.rows = self.__repair()
+        self.files = {name: open(self.column_path(name), 'ab') for name, dtype in columns}
+
+    def column_path(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def words_path(self, name):
+        return os.path.join(self.path, name + '.txt')
+
+    @staticmethod
+    def storage(dtype):
+        return np.dtype('<u4') if dtype is str else np.dtype(dtype).newbyteorder('<')
+
+    def __read_words(self, name):
+        try:
+            with open(self.words_path(name), encoding='utf-8') as f:
+                return {word: i for i, word in enumerate(f.read().splitlines())}
+        except FileNotFoundError:
+            return {}
+
+    def __repair(self):
+        lengths = []
+        for name, dtype in self.columns:
+            path = self.column_path(name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // self.storage(dtype).itemsize)
+        rows = min(lengths)
+        for name, dtype in self.columns:
+            path = self.column_path(name)
+            if os.path.exists(path):
+                os.truncate(path, rows * self.storage(dtype).itemsize)
+        return rows
+
+    def __word(self, name, value):
+        words = self.words[name]
+        index = words.get(value)
+        if index is None:
+            index = words[value] = len(words)
+            with open(self.words_path(name), 'a', encoding='utf-8') as f:
+                f.write(value + '\n')
+        return index
+
+    def append(self, row):
+        """
+        Write a row (a dict by column name) through to the disk.
+        """
+        for name, dtype in self.columns:
+            value = row[name]
+            if dtype is str:
+                value = self.__word(name, '' if value is None else str(value))
+            f = self.files[name]
+            f.write(np.array(value, dtype=self.storage(dtype)).tobytes())
+            f.flush()
+        self.rows += 1
+
+    def read(self):
+        """
+        :return: {name: array}, text columns decoded to object arrays.
+        """
+        table = {}
+        for name, dtype in self.columns:
+            path = self.column_path(name)
+            data = np.fromfile(path, dtype=self.storage(dtype), count=self.rows) if self.rows else \
+                np.zeros(0, dtype=self.storage(dtype))
+            if dtype is str:
+                words = np.array(sorted(self.words[name], key=self.words[name].get) or [''], dtype=object)
+                data = words[data]
+            table[name] = data
+        return table
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
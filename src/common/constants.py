@@ -7,5 +7,18 @@ SCREEN_H = 30
 MAP_W = 60 - 2
 MAP_H = SCREEN_H - 2
 
-DELAY = 100
+# In the turn loop held keys repeat after KEY_REPEAT_DELAY, every KEY_REPEAT_INTERVAL ms.
+KEY_REPEAT_DELAY = 250
+KEY_REPEAT_INTERVAL = 100
+# Longest wait for input in the turn loop, in ms.
+INPUT_TIMEOUT = 1000
+
+SAVE_FILE = '../saves/game.sav'
+PROFILE_FILE = '../saves/profile'
+AUTOSAVE_TURNS = 100
+
+# Monsters farther than this from the player doze: they only shuffle
+# around, DORMANT_SLOWDOWN times slower than normal.
+ACTIVITY_RADIUS = 15
+DORMANT_SLOWDOWN = 4
 BUFFER_H = SCREEN_H // 2 + 1
@@ -1,5 +1,7 @@
 import sys
 
+import numpy as np
+
 from graphics.window import *
 from .constants import SCREEN_W, SCREEN_H, MAP_W, MAP_H, BUFFER_H
 from .utils import *
@@ -44,8 +46,6 @@ COLOR_MAGIC = T.lighter_blue
 
 # --- KEYS --- #
 
-pygame.init()
-
 WALK_KEYS = [
     ([pygame.K_KP7], ('walk', (-1, -1))),
     ([pygame.K_KP8, pygame.K_UP], ('walk', (0, -1))),
@@ -107,6 +107,13 @@ class Quit(Exception):
     pass
 
 
+class WindowClosed(Quit):
+    """
+    The player closed the window: the game ends but is kept to be resumed.
+    """
+    pass
+
+
 # --- GAME --- #
 
 
@@ -124,22 +131,31 @@ def close():
     sys.exit()
 
 
+def headless():
+    return Window.instance().headless
+
+
 # --- UI --- #
 
 def _draw_map():
-    player = GAME.player
-    for x in range(MAP_W):
-        for y in range(MAP_H):
-            tile = GAME.map.tiles[x][y]
-            if GAME.map.is_visible(x, y):
-                c, color = tile.visible_glyph
-                d = dist(x, y, player.x, player.y)
-                if d > player.light_range + 1:
-                    color *= 0.6
-            else:
-                c, _ = tile.known_glyph
-                color = T.dark_grey
-            out(x + 1, y + 1, c, color)
+    from maps.tile import mob_glyph, obj_glyph
+    from maps.tile_grid import TILE_CHARS, TILE_COLORS
+    tiles = GAME.map.tiles
+    visible = GAME.map.visible_cells()
+    lit = GAME.map.lit_cells()
+    chars = np.where(visible, TILE_CHARS[tiles.type], tiles.known_char)
+    colors = np.where(visible[..., None], TILE_COLORS[tiles.type], np.array(tuple(T.dark_grey), dtype=np.uint8))
+    # What lies on the visible cells, each layer over the one before.
+    for layer, glyph in ((tiles.objs, obj_glyph), (tiles.items, lambda items: items[-1].glyph),
+                         (tiles.mobs, lambda mob: mob_glyph(mob, GAME.player))):
+        for (x, y), thing in layer.items():
+            if visible[x, y]:
+                shown = glyph(thing)
+                if shown:
+                    chars[x, y], colors[x, y] = shown[0], tuple(shown[1])
+    dim = visible & ~lit
+    colors[dim] = (colors[dim] * 0.6).astype(np.uint8)
+    Window.instance().out_block(1, 1, chars, colors)
 
 
 def _draw_bar(x, y, cur, max, color):
@@ -206,8 +222,11 @@ def message(s, color = T.white):
     s = s[0].upper() + s[1:]
     lines = _split_message(s, 40)
     for i, line in enumerate(lines):
-        print(line)
         MESSAGES.append((True, line, color))
+    if headless():
+        return
+    for line in lines:
+        print(line)
     _draw_messages()
     Window.instance().refresh()
 
@@ -221,6 +240,8 @@ def draw_statistics(y):
         out(40, y + 6, "Deaths       " + str(GAME.stats.player_death_count), T.light_grey)
         
 def draw_all():
+    if headless():
+        return
     Window.instance().clear()
     _draw_map()
     _draw_messages()
@@ -321,34 +342,14 @@ def prompt(s, choices=None):
         message(s, T.green)
         draw_all()
     if choices:
-        choices = list(choices)
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    if event.key in choices:
-                        pygame.event.clear()
-                        return event.key
+        return GAME.input.prompt(list(choices))
     else:
         return readkey()
 
 
 def readkey():
-    while True:
-        event = pygame.event.wait()
-        if event.type == pygame.QUIT:
-            pygame.event.clear()
-            close()
-        if event.type == pygame.KEYDOWN:
-            pygame.event.clear()
-            return event.key
+    return GAME.input.readkey()
 
 
 def anykey():
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.event.clear()
-                close()
-            if event.type == pygame.KEYDOWN:
-                if pygame.key.get_pressed()[pygame.K_RETURN]:
-                    return
+    GAME.input.anykey()
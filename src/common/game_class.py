@@ -1,22 +1,59 @@
+import os
+
 import pygame
 import tcod as T
 
 from common.game import init, close, message, COLOR_ERROR, \
-    draw_all, prompt, new_ui_turn, Quit, decode_walk_key, decode_interface_key, look_mode, \
+    draw_all, prompt, new_ui_turn, Quit, WindowClosed, decode_walk_key, decode_interface_key, look_mode, \
     MAX_DLEVEL, COLOR_ALERT
-from common.constants import VERSION, SCREEN_W, SCREEN_H, DELAY, TITLE
+from collections import deque
+
+from common.constants import VERSION, SCREEN_W, SCREEN_H, TITLE, AUTOSAVE_TURNS
 from common.stats import Stats
-from graphics.window import Window
+from common.input import KeyboardInput
+from common.journal import RecordingInput
+from common.profiler import start_from_environment
+from common.rng import new_seed, reseed, get_state, set_state
+from common.savegame import Autosaver, SaveError, dumps, read_file, write_file, save_stats, load_stats, \
+    save_player, load_player, save_map, load_map
+from maps.pregenerator import Pregenerator
+from graphics.window import Window, NullWindow
 
 
 class Game(object):
-    def __init__(self, wizard):
+    def __init__(self, wizard, headless=False, input_source=None, game_class=None, seed=None, save_path=None,
+                 journal_path=None):
+        """
+        :param headless: run without a display: nothing is drawn and the turn
+            loop is not throttled.
+        :param input_source: where the keys come from, the keyboard by default.
+        :param game_class: skip the class selection and play this class.
+        :param seed: seed of all the random streams of the game; the same
+            seed and the same keys replay the same game.
+        :param save_path: file the game is autosaved to and resumed from.
+        :param journal_path: file the keys of the game are recorded to, see
+            common.journal.
+        """
         from graphics.scenes.info_scene import InfoScene
+        start_from_environment()
         self.wizard = wizard
-        self.keydown = None
+        self.headless = headless
+        self.input = input_source or KeyboardInput()
+        self.journal = None
+        if journal_path:
+            self.journal = self.input = RecordingInput(self.input, journal_path)
+        self.game_class = game_class
+        self.seed = new_seed() if seed is None else seed
+        reseed(self.seed)
         self.stats = Stats()
         self.info_scene = InfoScene()
+        self.levels = Pregenerator()
+        self.save_path = save_path
+        self.autosaver = Autosaver(save_path) if save_path else None
 
+        if self.headless:
+            NullWindow(SCREEN_W, SCREEN_H)
+            return
         pygame.init()
         font = pygame.font.Font("../assets/fonts/UbuntuMono-R.ttf", 16)
         #font = pygame.font.Font("../assets/fonts/rainyhearts.ttf", 16)
@@ -25,38 +62,115 @@ class Game(object):
         window.title = TITLE + " v." + VERSION + " [WIZARD]" if self.wizard else ""
         window.icon = "../assets/icons/game.ico"
 
-    def play(self):
-        from graphics.scenes.intro_scene import IntroScene
-        from graphics.scenes.title_scene import TitleScene
+    def play(self, load_path=None):
+        """
+        :param load_path: resume this save game instead of the autosave.
+        """
         init(self)
-        TitleScene().show()
-        IntroScene().show()
-        self.start()
-        from graphics.scenes.choose_perk_scene import ChoosePerkScene
-        ChoosePerkScene(self.player).show()
-        self.info_scene.message("Welcome to the Old Temple!", "Brave adventurer, you are lost in the underground corridors of the Old Temple. It is very dangerous for a lonely traveler here. There is no way to return home. How long can you survive?")
-        self.info_scene.show()
-        self.loop()
-        close()
+        try:
+            if load_path is None and self.save_path and os.path.exists(self.save_path):
+                load_path = self.save_path
+            if load_path:
+                self.load(load_path)
+                if self.journal:
+                    self.journal.start(self, load_path)
+            else:
+                if not self.headless:
+                    from graphics.scenes.intro_scene import IntroScene
+                    from graphics.scenes.title_scene import TitleScene
+                    TitleScene().show()
+                    IntroScene().show()
+                self.start()
+                from graphics.scenes.choose_perk_scene import ChoosePerkScene
+                ChoosePerkScene(self.player).show()
+                self.info_scene.message("Welcome to the Old Temple!", "Brave adventurer, you are lost in the underground corridors of the Old Temple. It is very dangerous for a lonely traveler here. There is no way to return home. How long can you survive?")
+                self.info_scene.show()
+                self.autosave()
+            self.loop()
+        except Quit:
+            pass
+        finally:
+            # Everything is written before the window goes.
+            self.levels.shutdown()
+            if self.journal:
+                self.journal.close()
+            if self.autosaver:
+                self.autosaver.close()
+        if not self.headless:
+            close()
 
     def start(self):
-        from graphics.scenes.choose_game_class_scene import ChooseGameClassScene
-        scene = ChooseGameClassScene(self)
-        scene.show()
+        if self.game_class is None:
+            from graphics.scenes.choose_game_class_scene import ChooseGameClassScene
+            scene = ChooseGameClassScene(self)
+            scene.show()
+            self.game_class = scene.selected[1]
+        # The scenes before the game may have drawn numbers; the game itself
+        # always starts from the seed.
+        reseed(self.seed)
+        if self.journal:
+            self.journal.start(self)
 
         from mobs.player import Player
-        self.player = Player(self.wizard, scene.selected[1])
+        self.player = Player(self.wizard, self.game_class)
+        self.watch_player()
+        self.turns = 0
+        self.start_map(1)
+        self.final_boss()
+
+    def watch_player(self):
         self.player.on_damage += lambda dmg: self.__player_damaged(dmg)
         self.player.on_strike += lambda dmg: self.__player_striked(dmg)
         self.player.on_die += lambda damage: self.player_died(damage.defender, damage.attacker)
-        self.turns = 0
-        self.start_map(1)
+
+    def snapshot(self):
+        """
+        :return: the whole game state encoded as a save game.
+        """
+        return dumps({
+            'seed': self.seed,
+            'wizard': self.wizard,
+            'game_class': self.game_class.value,
+            'turns': self.turns,
+            'stats': save_stats(self.stats),
+            'player': save_player(self.player),
+            'map': save_map(self.map),
+            'rng': get_state(self.map.level),
+        })
+
+    def save(self, path):
+        write_file(path, self.snapshot())
+
+    def load(self, path):
+        from mobs.player import Classes
+        state = read_file(path)
+        try:
+            self.seed = state['seed']
+            self.wizard = state['wizard']
+            self.game_class = Classes(state['game_class'])
+            self.turns = state['turns']
+            self.stats = load_stats(state['stats'])
+            self.player = load_player(state['player'])
+            self.map = load_map(state['map'], self.player)
+            set_state(state['rng'])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise SaveError('Malformed save: %s' % e)
+        self.watch_player()
         self.final_boss()
+        self.levels.prepare(self.map.level + 1)
+
+    def autosave(self):
+        if self.autosaver and self.player.is_alive:
+            self.autosaver.save(self.snapshot())
 
     def player_died(self, player, murderer):
         self.stats.player_death_count += 1
         self.stats.player_last_death_reason = 'killed by %s' % (murderer.name)
+        self.stats.player_killer = type(murderer).__name__
+        self.stats.death_level = self.map.level
         message('You die...', COLOR_ERROR)
+        if self.autosaver:
+            self.autosaver.discard()
 
     def final_boss(self):
         from mobs.mobs import TrollKing
@@ -65,28 +179,37 @@ class Game(object):
                 mob.on_die += lambda damage: self.final_boss_died()
 
     def final_boss_died(self):
+        self.stats.boss_killed = True
         if prompt('You have defeated the Troll King! Press [ENTER] to continue...', [pygame.K_RETURN]) == pygame.K_RETURN:
             self.info_scene.message("You have defeated True Evil!", "You have come a long way and defeated the terrible tyrant Troll King! Now all the magical power of the Ruby Amulet is in your hands and the White Portal will show you the way home...")
             self.info_scene.show()
             new_ui_turn()
 
     def start_map(self, level):
-        from maps.map import Map
-        self.map = Map(level)
+        self.map = self.levels.take(level)
         x, y, _ = self.map.random_empty_tile()
         self.player.put(self.map, x, y)
+        self.levels.prepare(level + 1)
 
 
     def ascend(self):
         self.turns += 1
         self.start_map(self.map.level + 1)
+        self.stats.deepest_level = max(self.stats.deepest_level, self.map.level)
+        self.autosave()
 
     def loop(self):
         from graphics.scenes.rip_scene import RipScene
         draw_all()
+        # Events polled but not dispatched yet: the player acts once per
+        # event, so whatever comes after the last action of a turn waits for
+        # the next one.
+        pending = deque()
         try:
             while True:
                 if not self.player.is_alive:
+                    pending.clear()
+                    self.input.key_repeat(False)
                     if self.wizard:
                         if prompt('Die? (Y/N)', [pygame.K_y, pygame.K_n]) == pygame.K_n:
                             new_ui_turn()
@@ -99,19 +222,23 @@ class Game(object):
                         [pygame.K_RETURN])
                     scene = RipScene(self.turns, self.player)
                     scene.show()
+                self.input.key_repeat(True)
                 while self.player.action_turns > 0:
-                    for i in pygame.event.get():
-                        if i.type == pygame.KEYUP:
-                            self.do_command(i.key)
-                            self.keydown = None
-                        if i.type == pygame.KEYDOWN:
-                            self.keydown = i.key
-                    if self.keydown != None:
-                        self.do_walk_command(self.keydown)
+                    if not pending:
+                        pending.extend(self.input.poll())
+                        continue
+                    pressed, key = pending.popleft()
+                    if pressed:
+                        self.do_walk_command(key)
+                    else:
+                        self.do_command(key)
                 self.map.do_turn(self.turns)
                 self.turns += 1
-                # draw_all()
-                pygame.time.delay(DELAY)
+                if self.turns % AUTOSAVE_TURNS == 0:
+                    self.autosave()
+        except WindowClosed:
+            # Closing the window is how a game is kept for later.
+            self.autosave()
         except Quit:
             pass
 
@@ -132,11 +259,14 @@ class Game(object):
         if cmd is None:
             return
         new_ui_turn()
+        # Menus and prompts read single key presses.
+        self.input.key_repeat(False)
         if isinstance(cmd, str):
             getattr(self, 'cmd_' + cmd)()
         else:
             name, args = cmd
             getattr(self, 'cmd_' + name)(*args)
+        self.input.key_repeat(True)
         draw_all()
 
     def cmd_walk(self, dx, dy):
@@ -179,6 +309,8 @@ class Game(object):
     def cmd_quit(self):
         from graphics.scenes.rip_scene import RipScene
         if prompt('Quit? (Y/N)', [pygame.K_y, pygame.K_n]) == pygame.K_y:
+            if self.autosaver:
+                self.autosaver.discard()
             scene = RipScene(self.turns, self.player)
             scene.show()
         else:
@@ -0,0 +1,147 @@
+import time
+from typing import Iterable, List, Tuple
+
+import pygame
+
+from common.constants import INPUT_TIMEOUT, KEY_REPEAT_DELAY, KEY_REPEAT_INTERVAL
+
+
+class Input:
+    """
+    Source of key presses for the game.
+
+    `poll` returns the pending (pressed, key) pairs of the turn loop: walking
+    happens on every press (held keys repeat), interface commands fire on
+    release.
+    """
+
+    def readkey(self) -> int:
+        raise NotImplementedError()
+
+    def prompt(self, choices: List[int]) -> int:
+        while True:
+            key = self.readkey()
+            if key in choices:
+                return key
+
+    def anykey(self) -> None:
+        while self.readkey() != pygame.K_RETURN:
+            pass
+
+    def poll(self) -> List[Tuple[bool, int]]:
+        raise NotImplementedError()
+
+    def key_repeat(self, enabled: bool) -> None:
+        """
+        Repeat held keys (in the turn loop) or not (in menus and prompts).
+        """
+        pass
+
+
+class IdleStats:
+    """
+    Time spent waiting for keys, and the CPU time the process used meanwhile
+    (the pregenerator and the autosaver keep working while the player thinks).
+    """
+
+    def __init__(self):
+        self.waits = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.waits += 1
+        self.wall += wall
+        self.cpu += cpu
+
+    @property
+    def cpu_usage(self) -> float:
+        return self.cpu / self.wall if self.wall else 0.0
+
+    def __str__(self):
+        return 'waits: %d, idle: %.1fs, CPU while idle: %.1f%%' % (self.waits, self.wall, self.cpu_usage * 100)
+
+
+class KeyboardInput(Input):
+    """
+    Blocks on the event queue instead of polling it. Held keys are repeated
+    by pygame while `key_repeat` is on, so the turn loop only wakes up for
+    key events, or every `timeout` milliseconds.
+    """
+
+    def __init__(self, timeout: int = INPUT_TIMEOUT):
+        self.timeout = timeout
+        self.stats = IdleStats()
+        self.repeat = False
+
+    def key_repeat(self, enabled: bool) -> None:
+        if enabled != self.repeat:
+            self.repeat = enabled
+            if enabled:
+                pygame.key.set_repeat(KEY_REPEAT_DELAY, KEY_REPEAT_INTERVAL)
+            else:
+                pygame.key.set_repeat()
+
+    def wait(self, timeout: int = 0) -> pygame.event.Event:
+        wall, cpu = time.perf_counter(), time.process_time()
+        event = pygame.event.wait(timeout)
+        self.stats.add(time.perf_counter() - wall, time.process_time() - cpu)
+        return event
+
+    def events(self, timeout: int = 0) -> List[pygame.event.Event]:
+        """
+        :return: the next event and whatever else is pending.
+        """
+        from common.game import WindowClosed
+        events = [self.wait(timeout)] + pygame.event.get()
+        if any(event.type == pygame.QUIT for event in events):
+            pygame.event.clear()
+            raise WindowClosed()
+        return events
+
+    def readkey(self) -> int:
+        while True:
+            for event in self.events():
+                if event.type == pygame.KEYDOWN:
+                    pygame.event.clear()
+                    return event.key
+
+    def poll(self) -> List[Tuple[bool, int]]:
+        events = []
+        for event in self.events(self.timeout):
+            if event.type == pygame.KEYUP:
+                events.append((False, event.key))
+            if event.type == pygame.KEYDOWN:
+                # Repeats that piled up during a slow turn are dropped.
+                if events and events[-1] == (True, event.key):
+                    continue
+                events.append((True, event.key))
+        return events
+
+
+class ScriptedInput(Input):
+    """
+    Plays a fixed sequence of keys. Each key of the turn loop is pressed on
+    one poll and released on the next. Raises Quit when the keys run out.
+    """
+
+    def __init__(self, keys: Iterable[int]):
+        self.keys = iter(keys)
+        self.__pressed = None
+
+    def next_key(self) -> int:
+        from common.game import Quit
+        try:
+            return next(self.keys)
+        except StopIteration:
+            raise Quit()
+
+    def readkey(self) -> int:
+        return self.next_key()
+
+    def poll(self) -> List[Tuple[bool, int]]:
+        if self.__pressed is not None:
+            key, self.__pressed = self.__pressed, None
+            return [(False, key)]
+        self.__pressed = self.next_key()
+        return [(True, self.__pressed)]
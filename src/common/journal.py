@@ -0,0 +1,155 @@
+"""
+Input journals.
+
+A journal is a JSON-lines file: a header with the seed and the player's
+class, then every key the game read, with the turn it was read on and the
+command it decodes to. Replaying a journal on a headless game with the same
+seed repeats the session, at full speed.
+
+The journal of a resumed game starts from the save it was resumed from: a
+copy of it is kept next to the journal (<journal>.save) and named in the
+header.
+"""
+import json
+import os
+import shutil
+from typing import List, Tuple
+
+from common.input import Input
+
+JOURNAL_VERSION = 2
+
+
+class ReplayError(Exception):
+    pass
+
+
+def describe(key):
+    from common.game import decode_walk_key, decode_interface_key
+    cmd = decode_walk_key(key) or decode_interface_key(key)
+    return cmd if cmd is None or isinstance(cmd, str) else cmd[0]
+
+
+class RecordingInput(Input):
+    """
+    Passes the keys of another input through and writes them to a journal
+    once `start` is called (the scenes before the game starts are left out).
+    """
+
+    def __init__(self, source: Input, path: str):
+        self.source = source
+        self.path = path
+        self.file = None
+        self.game = None
+
+    def start(self, game, save_path=None):
+        """
+        :param save_path: the save game was resumed from.
+        """
+        self.game = game
+        header = {'version': JOURNAL_VERSION, 'seed': game.seed,
+                  'game_class': game.game_class.name, 'wizard': game.wizard}
+        if save_path:
+            # The game keeps autosaving over its save, so the replay needs a copy.
+            shutil.copyfile(save_path, self.path + '.save')
+            header['save'] = os.path.basename(self.path) + '.save'
+        self.file = open(self.path, 'w')
+        self.__write(header)
+
+    def __write(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+
+    def __record(self, entry):
+        if self.game is not None:
+            self.__write(dict(t=self.game.turns, **entry))
+
+    def readkey(self) -> int:
+        key = self.source.readkey()
+        self.__record({'key': key, 'cmd': describe(key)})
+        return key
+
+    def prompt(self, choices: List[int]) -> int:
+        key = self.source.prompt(choices)
+        self.__record({'key': key, 'cmd': describe(key)})
+        return key
+
+    def anykey(self) -> None:
+        self.source.anykey()
+        self.__record({'anykey': True})
+
+    def poll(self) -> List[Tuple[bool, int]]:
+        events = self.source.poll()
+        # Empty polls (input timeouts) do nothing and are left out.
+        if events:
+            self.__record({'poll': events, 'cmd': [describe(key) for pressed, key in events]})
+        return events
+
+    def key_repeat(self, enabled: bool) -> None:
+        self.source.key_repeat(enabled)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def read_journal(path):
+    """
+    :return: the header and the list of entries of a journal.
+    """
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get('version') != JOURNAL_VERSION:
+        raise ReplayError('Not a journal: %s' % path)
+    return lines[0], lines[1:]
+
+
+class ReplayInput(Input):
+    """
+    Plays the keys of a journal back. Raises Quit at the end of it.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.pos = 0
+
+    def __next(self, kind):
+        from common.game import Quit
+        if self.pos >= len(self.entries):
+            raise Quit()
+        entry = self.entries[self.pos]
+        if kind not in entry:
+            raise ReplayError('Journal out of step at entry %d: expected %s, found %s' % (self.pos, kind, entry))
+        self.pos += 1
+        return entry
+
+    def readkey(self) -> int:
+        return self.__next('key')['key']
+
+    def prompt(self, choices: List[int]) -> int:
+        return self.__next('key')['key']
+
+    def anykey(self) -> None:
+        self.__next('anykey')
+
+    def poll(self) -> List[Tuple[bool, int]]:
+        return [(pressed, key) for pressed, key in self.__next('poll')['poll']]
+
+
+def replay(path, until_turn=None):
+    """
+    Run a journal on a headless game.
+
+    :param until_turn: stop there instead of at the end of the journal.
+    :return: the game, in its state at the end of the replay.
+    """
+    from common.game_class import Game
+    from mobs.player import Classes
+    header, entries = read_journal(path)
+    if until_turn is not None:
+        entries = [entry for entry in entries if entry['t'] < until_turn]
+    game = Game(header['wizard'], headless=True, input_source=ReplayInput(entries),
+                game_class=Classes[header['game_class']], seed=header['seed'])
+    save = header.get('save')
+    game.play(load_path=os.path.join(os.path.dirname(path), save) if save else None)
+    return game
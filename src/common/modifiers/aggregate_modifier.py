@@ -17,6 +17,10 @@ class AggregateModifier(Modifier):
         for mod in self.mods:
             mod.rollback(mob)
 
+    def reattach(self, mob):
+        for mod in self.mods:
+            mod.reattach(mob)
+
     def __iadd__(self, other):
         if not type(other) is Modifier:
             if isinstance(other, AggregateModifier):
@@ -19,6 +19,10 @@ class Mod(Modifier):
 
     def commit(self, mob):
         setattr(mob, self.attr_name, getattr(mob, self.attr_name) + self.value)
+        if self.attr_name == 'speed':
+            mob.reschedule()
 
     def rollback(self, mob):
         setattr(mob, self.attr_name, getattr(mob, self.attr_name) - self.value)
+        if self.attr_name == 'speed':
+            mob.reschedule()
@@ -16,6 +16,11 @@ class Modifier:
     def rollback(self, mob):
         pass
 
+    def reattach(self, mob):
+        # A loaded mob already carries the attributes the modifier changed;
+        # only what commit did outside of them has to be done again.
+        pass
+
     def act(self, mob):
         pass
 
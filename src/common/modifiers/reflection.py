@@ -11,7 +11,7 @@ class Reflection(Modifier):
     def __init__(self, chance_percent: int, value_percent: int):
         self.chance_percent = chance_percent
         self.value_percent = value_percent
-        self.f = lambda damage: self.__mod_damaged(damage)
+        self.f = self.__mod_damaged
 
     @property
     def descr(self):
@@ -25,6 +25,9 @@ class Reflection(Modifier):
         super().rollback(mob)
         mob.on_damage -= self.f
 
+    def reattach(self, mob):
+        mob.on_damage += self.f
+
     def __mod_damaged(self, damage: Damage):
         if damage.value > 0:
             chance_percent = self.chance_percent + damage.defender.reflect_chance_bonus
@@ -0,0 +1,201 @@
+"""
+Opt-in timers around the hot paths of a turn.
+
+When the profiler is on, each function in TARGETS is replaced by a wrapper
+that times its calls; the methods in BY_CLASS are timed under the class of
+the object they are called on (the `act` of every monster kind apart). The
+timings go into a log2 histogram
+per function and into folded call stacks ("Map.do_turn;Goblin.act 1234", in
+microseconds of self time), the input format of flamegraph.pl and
+speedscope. When it is off the original functions are put back, so it costs
+nothing.
+
+It is switched on by the TROLLS_PROFILE environment variable, set to the
+prefix of the files written on exit, or with the `profile` debug command
+(`profile on`, `profile off`, `profile dump`).
+"""
+import atexit
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+PROFILE_VARIABLE = 'TROLLS_PROFILE'
+
+# (module, function or Class.method)
+TARGETS = [
+    ('maps.map', 'Map.do_turn'),
+    ('maps.map', 'Map.recalc_fov'),
+    ('maps.map', 'Map.populate'),
+    ('maps.generator', 'MapGenerator.generate'),
+    ('mobs.monster', 'Monster.act'),
+    ('mobs.player', 'Player.act'),
+    ('common.game', 'draw_all'),
+    ('graphics.window', 'Window.out'),
+]
+
+BY_CLASS = {'Monster.act', 'Player.act'}
+
+BUCKETS = 40
+
+
+class Histogram(object):
+    """
+    Call count, total and maximum time, and counts per power of two of
+    nanoseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total / 1e6,
+            'mean_us': self.total / self.count / 1e3 if self.count else 0.0,
+            'max_us': self.max / 1e3,
+            # Upper bound of each bucket in microseconds.
+            'buckets': {'%g' % (2 ** i / 1e3): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Profiler(object):
+    def __init__(self):
+        self.histograms = {}
+        self.stacks = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.originals = []
+        self.dump_prefix = None
+
+    @property
+    def enabled(self):
+        return bool(self.originals)
+
+    def call(self, name, f, *args, **kwargs):
+        """
+        Time one call of f under `name`.
+        """
+        local = self.local
+        frames = getattr(local, 'frames', None)
+        if frames is None:
+            frames = local.frames = []
+        path = frames[-1][0] + ';' + name if frames else name
+        # [stack path, time spent in timed callees]
+        frame = [path, 0]
+        frames.append(frame)
+        start = time.perf_counter_ns()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            frames.pop()
+            if frames:
+                frames[-1][1] += elapsed
+            with self.lock:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.add(elapsed)
+                self.stacks[path] = self.stacks.get(path, 0) + elapsed - frame[1]
+
+    def wrap(self, name, f, by_class=False):
+        call = self.call
+        if by_class:
+            method = '.' + name.rsplit('.', 1)[-1]
+
+            @wraps(f)
+            def timed(obj, *args, **kwargs):
+                return call(type(obj).__name__ + method, f, obj, *args, **kwargs)
+        else:
+            @wraps(f)
+            def timed(*args, **kwargs):
+                return call(name, f, *args, **kwargs)
+        timed.__profiled__ = f
+        return timed
+
+    def enable(self):
+        if self.enabled:
+            return
+        for module_name, target in TARGETS:
+            owner = importlib.import_module(module_name)
+            *path, attr = target.split('.')
+            for part in path:
+                owner = getattr(owner, part)
+            f = owner.__dict__[attr]
+            timed = self.wrap(target, f, target in BY_CLASS)
+            self.originals.append((owner, attr, f, timed))
+            setattr(owner, attr, timed)
+            if not path:
+                # Plain functions are also imported by name elsewhere.
+                self.rebind(attr, f, timed)
+
+    def disable(self):
+        for owner, attr, f, timed in reversed(self.originals):
+            setattr(owner, attr, f)
+            if isinstance(owner, type(sys)):
+                # Modules imported meanwhile may have picked up the wrapper.
+                self.rebind(attr, timed, f)
+        self.originals.clear()
+
+    @staticmethod
+    def rebind(attr, old, new):
+        """
+        Replace `old` by `new` wherever a module bound it to `attr`.
+        """
+        for module in list(sys.modules.values()):
+            if getattr(module, '__dict__', {}).get(attr) is old:
+                setattr(module, attr, new)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.stacks.clear()
+
+    def report(self):
+        with self.lock:
+            return {name: histogram.as_dict() for name, histogram in sorted(self.histograms.items())}
+
+    def folded(self):
+        with self.lock:
+            return ''.join('%s %d\n' % (path, ns // 1000) for path, ns in sorted(self.stacks.items()) if ns >= 1000)
+
+    def dump(self, prefix):
+        """
+        Write <prefix>.json (the histograms) and <prefix>.folded (the stacks).
+        """
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(prefix + '.json', 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(prefix + '.folded', 'w') as f:
+            f.write(self.folded())
+
+    def dump_at_exit(self, prefix):
+        if self.dump_prefix is None:
+            atexit.register(lambda: self.dump(self.dump_prefix))
+        self.dump_prefix = prefix
+
+
+PROFILER = Profiler()
+
+
+def start_from_environment():
+    prefix = os.environ.get(PROFILE_VARIABLE)
+    if prefix:
+        PROFILER.enable()
+        PROFILER.dump_at_exit(prefix)
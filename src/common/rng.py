@@ -0,0 +1,138 @@
+"""
+Seeded random streams.
+
+Every subsystem draws from its own stream derived from the game seed, so a
+game can be replayed from its seed and a subsystem (say, map generation on
+a worker thread) does not shift the numbers any other one sees:
+
+    with stream('mapgen', level):
+        ...
+
+The module-level functions mirror the `random` module and draw from the
+stream selected on the current thread, or from the 'game' stream.
+"""
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from random import Random, SystemRandom
+
+import numpy as np
+
+__all__ = ['random', 'randrange', 'randint', 'choice', 'shuffle', 'sample', 'uniform']
+
+
+def new_seed():
+    return SystemRandom().randrange(2 ** 32)
+
+
+class Streams(object):
+    def __init__(self, seed):
+        self.seed = seed
+        self.streams = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, *key):
+        with self.lock:
+            rng = self.streams.get((name,) + key)
+            if rng is None:
+                rng = self.streams[(name,) + key] = Random('%d:%s:%r' % (self.seed, name, key))
+            return rng
+
+
+_local = threading.local()
+_streams = Streams(new_seed())
+_default = _streams.get('game')
+
+
+def reseed(seed):
+    """
+    Start all streams over from the given game seed.
+    """
+    global _streams, _default
+    _streams = Streams(seed)
+    _default = _streams.get('game')
+
+
+def game_seed():
+    return _streams.seed
+
+
+# Streams with one instance per dungeon level.
+LEVEL_STREAMS = ('mapgen', 'population')
+
+
+def get_state(level):
+    """
+    :return: the seed and the position of every stream. Streams of levels
+        past `level` are left out: a level built ahead of time is not kept,
+        so after loading it is built again from a fresh stream, exactly as
+        it was the first time.
+    """
+    streams = {}
+    for key, rng in list(_streams.streams.items()):
+        if key[0] in LEVEL_STREAMS and key[1] > level:
+            continue
+        version, internal, gauss = rng.getstate()
+        streams[key] = (version, np.array(internal, dtype=np.uint32), gauss)
+    return {'seed': _streams.seed, 'streams': streams}
+
+
+def set_state(state):
+    reseed(state['seed'])
+    for key, (version, internal, gauss) in state['streams'].items():
+        _streams.get(*key).setstate((version, tuple(int(v) for v in internal), gauss))
+
+
+def current():
+    return getattr(_local, 'current', None) or _default
+
+
+@contextmanager
+def stream(name, *key):
+    previous = getattr(_local, 'current', None)
+    _local.current = _streams.get(name, *key)
+    try:
+        yield _local.current
+    finally:
+        _local.current = previous
+
+
+def in_stream(name):
+    """
+    Decorator: run the function with the given stream selected.
+    """
+    def decorate(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with stream(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def random():
+    return current().random()
+
+
+def randrange(*args):
+    return current().randrange(*args)
+
+
+def randint(a, b):
+    return current().randint(a, b)
+
+
+def choice(seq):
+    return current().choice(seq)
+
+
+def shuffle(x):
+    current().shuffle(x)
+
+
+def sample(population, k):
+    return current().sample(population, k)
+
+
+def uniform(a, b):
+    return current().uniform(a, b)
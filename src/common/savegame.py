@@ -0,0 +1,542 @@
+"""
+Binary save games.
+
+A save is a tree of plain values: None, booleans, numbers, strings, bytes,
+tuples, lists, dicts and numpy arrays of booleans, integers or characters,
+each written with a one-byte tag. Nothing else can be written or read back: there are no
+class names and no object references in a save.
+
+The game is turned into that tree by explicit record schemas, one per kind
+of entity (stats, items, modifiers, effects, monsters, the player, map
+objects and the map with its scheduler). A record names the kind of its
+entity, which is looked up among the game's own classes, and holds only the
+fields its schema lists. Everything that can be derived from those fields
+(walkability, the free-cell index, occupancy arrays, FOV masks, flow fields,
+event subscriptions) is rebuilt on loading instead of being saved.
+"""
+import os
+import queue
+import struct
+import tempfile
+import threading
+
+import numpy as np
+import tcod as T
+
+MAGIC = b'TROLLSAV'
+SAVE_VERSION = 2
+
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_HEADER = struct.Struct('<8sH')
+
+# Kinds of numpy arrays a save may hold: booleans, integers and characters.
+ARRAY_KINDS = 'biuU'
+
+
+class SaveError(Exception):
+    pass
+
+
+# --- VALUES --- #
+
+class Encoder(object):
+    def __init__(self):
+        self.out = bytearray()
+
+    def uint(self, n):
+        self.out += _U32.pack(n)
+
+    def text(self, s):
+        data = s.encode('utf-8')
+        self.uint(len(data))
+        self.out += data
+
+    def encode(self, value):
+        out = self.out
+        t = type(value)
+        if value is None:
+            out += b'N'
+        elif t is bool:
+            out += b'T' if value else b'F'
+        elif t is int:
+            if -2 ** 63 <= value < 2 ** 63:
+                out += b'i'
+                out += _I64.pack(value)
+            else:
+                data = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+                out += b'I'
+                self.uint(len(data))
+                out += data
+        elif t is float:
+            out += b'f'
+            out += _F64.pack(value)
+        elif t is str:
+            out += b's'
+            self.text(value)
+        elif t is bytes:
+            out += b'b'
+            self.uint(len(value))
+            out += value
+        elif t is tuple or t is list:
+            out += b't' if t is tuple else b'l'
+            self.uint(len(value))
+            for item in value:
+                self.encode(item)
+        elif t is dict:
+            out += b'd'
+            self.uint(len(value))
+            for k, v in value.items():
+                self.encode(k)
+                self.encode(v)
+        elif t is np.ndarray and value.dtype.kind in ARRAY_KINDS:
+            out += b'A'
+            self.array(value)
+        elif isinstance(value, (np.bool_, np.integer, np.floating)):
+            self.encode(value.item())
+        else:
+            raise SaveError('Cannot save %r' % (value,))
+
+    def array(self, value):
+        value = np.ascontiguousarray(value)
+        self.text(value.dtype.str)
+        self.uint(value.ndim)
+        for n in value.shape:
+            self.uint(n)
+        data = value.tobytes()
+        self.uint(len(data))
+        self.out += data
+
+
+class Decoder(object):
+    def __init__(self, data, pos=0):
+        self.data = memoryview(data)
+        self.pos = pos
+
+    def take(self, n):
+        pos = self.pos
+        self.pos += n
+        if self.pos > len(self.data):
+            raise SaveError('Truncated save')
+        return self.data[pos:self.pos]
+
+    def uint(self):
+        return _U32.unpack(self.take(4))[0]
+
+    def text(self):
+        return str(self.take(self.uint()), 'utf-8')
+
+    def decode(self):
+        tag = bytes(self.take(1))
+        if tag == b'N':
+            return None
+        if tag == b'T':
+            return True
+        if tag == b'F':
+            return False
+        if tag == b'i':
+            return _I64.unpack(self.take(8))[0]
+        if tag == b'I':
+            return int.from_bytes(self.take(self.uint()), 'little', signed=True)
+        if tag == b'f':
+            return _F64.unpack(self.take(8))[0]
+        if tag == b's':
+            return self.text()
+        if tag == b'b':
+            return bytes(self.take(self.uint()))
+        if tag == b't':
+            return tuple(self.decode() for i in range(self.uint()))
+        if tag == b'l':
+            return [self.decode() for i in range(self.uint())]
+        if tag == b'd':
+            value = {}
+            for i in range(self.uint()):
+                k = self.decode()
+                value[k] = self.decode()
+            return value
+        if tag == b'A':
+            return self.array()
+        raise SaveError('Unknown record %r' % tag)
+
+    def array(self):
+        try:
+            dtype = np.dtype(self.text())
+        except TypeError:
+            raise SaveError('Unknown array type')
+        if dtype.kind not in ARRAY_KINDS:
+            raise SaveError('Refusing to load %s array' % dtype)
+        shape = tuple(self.uint() for i in range(self.uint()))
+        try:
+            return np.frombuffer(self.take(self.uint()), dtype=dtype).reshape(shape).copy()
+        except ValueError:
+            raise SaveError('Malformed array')
+
+
+def dumps(value):
+    encoder = Encoder()
+    encoder.out += _HEADER.pack(MAGIC, SAVE_VERSION)
+    encoder.encode(value)
+    return bytes(encoder.out)
+
+
+def loads(data):
+    if len(data) < _HEADER.size:
+        raise SaveError('Not a save game')
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveError('Not a save game')
+    if version != SAVE_VERSION:
+        raise SaveError('Unsupported save version %d' % version)
+    return Decoder(data, _HEADER.size).decode()
+
+
+# --- RECORDS --- #
+
+STATS_FIELDS = ('player_death_count', 'player_last_death_reason', 'player_killer', 'death_level',
+                'deepest_level', 'boss_killed')
+
+# Numeric attributes of mobs; modifiers may only change these.
+STAT_FIELDS = ('speed', 'armor', 'evasion', 'accuracy', 'blocking', 'poison', 'magic', 'range', 'radius',
+               'life_regen', 'mana_regen', 'reflect_damage_bonus', 'reflect_chance_bonus', 'damage_bonus',
+               'bonus_damage')
+
+MOB_FIELDS = STAT_FIELDS + ('x', 'y', 'poisoned', 'confused', 'dormant', 'is_alive', 'to_life_regen',
+                            'to_mana_regen')
+
+PLAYER_FIELDS = MOB_FIELDS + (
+    'wizard', 'level', 'exp', 'kills', 'fov_range', 'light_range', 'action_turns',
+    'has_life_adv_drop', 'has_mana_adv_drop', 'holding_dagger', 'holding_bow', 'holding_quiver',
+    'has_spellbook', 'has_craftbox', 'has_alchemyset', 'can_use_lockpick', 'can_use_dagger', 'can_use_staff',
+    'can_use_shield', 'can_use_bow', 'can_wear_cloth_armor', 'can_wear_leather_armor', 'can_wear_mail_armor')
+
+ITEM_FIELDS = ('name', 'magical', 'dice', 'arrows_left', 'turns_left', 'has_skin')
+
+OBJECT_FIELDS = ('used', 'locked', 'broken')
+
+
+def kinds(base):
+    """
+    :return: the classes derived from `base` by name, to look up the kind
+        named by a record.
+    """
+    found, todo = {}, [base]
+    while todo:
+        cls = todo.pop()
+        found[cls.__name__] = cls
+        todo.extend(cls.__subclasses__())
+    return found
+
+
+def kind(table, name):
+    cls = table.get(name)
+    if cls is None:
+        raise SaveError('Unknown kind %r' % (name,))
+    return cls
+
+
+def save_fields(obj, fields):
+    # Only what the entity itself holds: class defaults stay in the class.
+    state = vars(obj)
+    return dict((name, state[name]) for name in fields if name in state)
+
+
+def load_fields(obj, record, fields):
+    for name in fields:
+        if name in record:
+            setattr(obj, name, record[name])
+
+
+def save_color(color):
+    return tuple(int(c) for c in color)
+
+
+def load_color(rgb):
+    return T.Color(*rgb)
+
+
+def save_stats(stats):
+    return save_fields(stats, STATS_FIELDS)
+
+
+def load_stats(record):
+    from common.stats import Stats
+    stats = Stats()
+    load_fields(stats, record, STATS_FIELDS)
+    return stats
+
+
+def save_modifier(mod):
+    from common.modifiers.aggregate_modifier import AggregateModifier
+    from common.modifiers.attrib_mod import AttribMod, AddMaxLife, AddMaxMana
+    from common.modifiers.mod import Mod
+    from common.modifiers.add_damage import DamageMod
+    from common.modifiers.reflection import Reflection
+    from common.modifiers.tag_mod import TagMod
+    record = {'kind': type(mod).__name__}
+    if isinstance(mod, AggregateModifier):
+        record['mods'] = [save_modifier(m) for m in mod.mods]
+    elif isinstance(mod, (AddMaxLife, AddMaxMana, DamageMod)):
+        record['value'] = mod.value
+    elif isinstance(mod, (Mod, AttribMod)):
+        record['attr_name'], record['value'] = mod.attr_name, mod.value
+    elif isinstance(mod, Reflection):
+        record['chance_percent'], record['value_percent'] = mod.chance_percent, mod.value_percent
+    elif isinstance(mod, TagMod):
+        record['tag'] = mod.tag.value
+    return record
+
+
+def load_modifier(record):
+    from common.modifiers.modifier import Modifier
+    from common.modifiers.aggregate_modifier import AggregateModifier
+    from common.modifiers.attrib_mod import AttribMod, AddMaxLife, AddMaxMana
+    from common.modifiers.mod import Mod
+    from common.modifiers.add_damage import DamageMod
+    from common.modifiers.reflection import Reflection
+    from common.modifiers.tag_mod import TagMod, Tag
+    cls = kind(kinds(Modifier), record['kind'])
+    if issubclass(cls, AggregateModifier):
+        return cls(*[load_modifier(m) for m in record['mods']])
+    if issubclass(cls, (AddMaxLife, AddMaxMana, DamageMod)):
+        return cls(record['value'])
+    if issubclass(cls, (Mod, AttribMod)):
+        attr_name = record['attr_name']
+        names = AttribMod.DESCRIPTIONS if issubclass(cls, AttribMod) else STAT_FIELDS
+        if attr_name not in names:
+            raise SaveError('%s cannot change %r' % (cls.__name__, attr_name))
+        return cls(attr_name, record['value'])
+    if issubclass(cls, Reflection):
+        return cls(record['chance_percent'], record['value_percent'])
+    if issubclass(cls, TagMod):
+        return cls(Tag(record['tag']))
+    return cls()
+
+
+def save_item(item):
+    record = save_fields(item, ITEM_FIELDS)
+    record['kind'] = type(item).__name__
+    state = vars(item)
+    if 'color' in state:
+        record['color'] = save_color(item.color)
+    if 'glyph' in state:
+        record['glyph'] = item.glyph[0], save_color(item.glyph[1])
+    if 'modifier' in state:
+        record['modifier'] = save_modifier(item.modifier)
+    return record
+
+
+def load_item(record):
+    from items.Item import Item
+    cls = kind(kinds(Item), record['kind'])
+    # Not built by its constructor, which would roll a new item: every
+    # field the item keeps is in the record.
+    item = cls.__new__(cls)
+    load_fields(item, record, ITEM_FIELDS)
+    if 'color' in record:
+        item.color = load_color(record['color'])
+    if 'glyph' in record:
+        char, rgb = record['glyph']
+        item.glyph = char, load_color(rgb)
+    if 'modifier' in record:
+        item.modifier = load_modifier(record['modifier'])
+    return item
+
+
+def save_effects(mob):
+    return [{'modifier': save_modifier(effect.modifier), 'max_turns': effect.max_turns, 'turns': effect.turns}
+            for effect in mob.effects.array]
+
+
+def load_effects(mob, records):
+    from mobs.effects.uni_effect import UniEffect
+    for record in records:
+        effect = UniEffect(load_modifier(record['modifier']), record['max_turns'])
+        effect.turns = record['turns']
+        mob.effects.reattach(effect)
+
+
+def save_mob(mob, fields):
+    record = save_fields(mob, fields)
+    record['kind'] = type(mob).__name__
+    record['life'] = mob.life.cur, mob.life.max
+    record['mana'] = mob.mana.cur, mob.mana.max
+    record['tags'] = dict((tag.value, n) for tag, n in mob.tags.items())
+    record['effects'] = save_effects(mob)
+    return record
+
+
+def load_mob(mob, record, fields):
+    from common.modifiers.tag_mod import Tag
+    load_fields(mob, record, fields)
+    for atrib, (cur, max_value) in ((mob.life, record['life']), (mob.mana, record['mana'])):
+        atrib.max = max_value
+        atrib.cur = cur
+    mob.tags = dict((Tag(tag), n) for tag, n in record['tags'].items())
+    load_effects(mob, record['effects'])
+
+
+def save_monster(mob):
+    return save_mob(mob, MOB_FIELDS)
+
+
+def load_monster(record):
+    from mobs.monster import Monster
+    mob = kind(kinds(Monster), record['kind'])()
+    load_mob(mob, record, MOB_FIELDS)
+    return mob
+
+
+def save_player(player):
+    record = save_mob(player, PLAYER_FIELDS)
+    record['game_class'] = player.game_class.value
+    record['invisibility'] = player.invisibility.value
+    record['items'] = [save_item(item) for item in player.items]
+    record['equipment'] = dict((slot, index_of(player.items, item) if item else None)
+                               for slot, item in player.equipment.items())
+    record['perks'] = player.perks.learned()
+    record['spells'] = [type(spell).__name__ for spell in player.spells]
+    return record
+
+
+def index_of(items, item):
+    for i, other in enumerate(items):
+        if other is item:
+            return i
+    raise SaveError('%s is equipped but not carried' % item.name)
+
+
+def load_player(record):
+    from mobs.player import Player, Classes, Invisibility
+    from mobs.perks.perk import Perk
+    import mobs.perks.fighter_perks
+    import mobs.perks.perks
+    from common.spells import Spell
+    player = Player(record['wizard'], Classes(record['game_class']))
+    load_mob(player, record, PLAYER_FIELDS)
+    player.invisibility = Invisibility(record['invisibility'])
+    player.items = [load_item(item) for item in record['items']]
+    for slot in player.equipment:
+        index = record['equipment'][slot]
+        item = player.equipment[slot] = None if index is None else player.items[index]
+        # Its modifier is already counted in the saved attributes.
+        if item and 'modifier' in vars(item):
+            item.modifier.reattach(player)
+    perks = dict((cls.name(), cls) for cls in Perk.ALL)
+    for name, count in record['perks'].items():
+        player.perks.restore(kind(perks, name), count)
+    spells = kinds(Spell)
+    player.spells = [kind(spells, name)() for name in record['spells']]
+    return player
+
+
+def save_map(m):
+    tiles = m.tiles
+    objs = []
+    for (x, y), obj in tiles.objs.items():
+        record = save_fields(obj, OBJECT_FIELDS)
+        record.update(kind=type(obj).__name__, x=x, y=y)
+        objs.append(record)
+    index = dict((id(mob), i) for i, mob in enumerate(m.mobs))
+    return {
+        'level': m.level,
+        'types': tiles.type,
+        'known_char': tiles.known_char,
+        'known_color': tiles.known_color,
+        'objs': objs,
+        'items': [{'x': x, 'y': y, 'items': [save_item(item) for item in items]}
+                  for (x, y), items in tiles.items.items()],
+        'mobs': [None if mob is m.player else save_monster(mob) for mob in m.mobs],
+        'now': m.scheduler.now,
+        'timetable': [(index[id(mob)], time, last) for mob, time, last in m.scheduler.timetable()],
+    }
+
+
+def load_map(record, player):
+    from maps.map import Map
+    from maps.objects import MapObject
+    from maps.tile_grid import TileGrid, TILE_TYPES
+    types = record['types']
+    if types.ndim != 2 or types.size == 0 or types.max() >= len(TILE_TYPES):
+        raise SaveError('Malformed map')
+    m = Map(record['level'], populate=False, tiles=TileGrid(types))
+    tiles = m.tiles
+    objs = kinds(MapObject)
+    for obj_record in record['objs']:
+        obj = kind(objs, obj_record['kind'])()
+        load_fields(obj, obj_record, OBJECT_FIELDS)
+        tiles[obj_record['x']][obj_record['y']].obj = obj
+    for cell in record['items']:
+        tiles[cell['x']][cell['y']].items.extend(load_item(item) for item in cell['items'])
+
+    mobs = [player if mob is None else load_monster(mob) for mob in record['mobs']]
+    # The view is computed before the monsters are on the map, so that it
+    # does not wake any of them up: their activity is in their records.
+    player.map, m.player = m, player
+    tiles.set_mob(player.x, player.y, player)
+    m.recalc_fov()
+    tiles.known_char[...] = record['known_char']
+    tiles.known_color[...] = record['known_color']
+    for mob in mobs:
+        mob.map = m
+        if mob is not player:
+            if tiles.mob[mob.x, mob.y]:
+                raise SaveError('Two mobs on %d, %d' % (mob.x, mob.y))
+            tiles.set_mob(mob.x, mob.y, mob)
+    m.mobs.extend(mobs)
+    m.scheduler.restore(record['now'], [(mobs[i], time, last) for i, time, last in record['timetable']])
+    return m
+
+
+# --- FILES --- #
+
+def write_file(path, data):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+class Autosaver(object):
+    """
+    Writes snapshots to disk on a background thread. The snapshot itself is
+    encoded by the caller, between turns, so it is always consistent.
+    """
+    DISCARD = 'discard'
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.__run, name='autosave', daemon=True)
+        self.thread.start()
+
+    def save(self, data):
+        self.queue.put(data)
+
+    def discard(self):
+        """
+        Delete the save once the pending writes are done.
+        """
+        self.queue.put(self.DISCARD)
+
+    def __run(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            if data == self.DISCARD:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            else:
+                write_file(self.path, data)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
@@ -1,3 +1,12 @@
 class Stats:
+    """
+    What happened in a game, for the statistics screens and the balance
+    runs.
+    """
     player_death_count = 0
     player_last_death_reason = ''
+    # Monster class name and dungeon level of the last death.
+    player_killer = None
+    death_level = None
+    deepest_level = 1
+    boss_killed = False
@@ -1,4 +1,4 @@
-from random import *
+from common.rng import *
 
 # --- UTILS --- #
 
@@ -47,15 +47,57 @@ def describe_dice(a, b, c):
         s += '-%d' % (-c)
     return s
 
-def random_by_level(level, items):
-    items = [a for a in items if (a.dungeons[0] <= level <= a.dungeons[1] and rand(1, a.rarity) == 1)]    
-    n = randrange(sum(item.common for item in items))
-    for item in items:
-        if n < item.common:
-            return item
+def level_weights(level, items):
+    """
+    :return: the items found on a level and the chance of each to be picked.
+
+    An item takes part in a draw one time in `rarity`, and is then picked in
+    proportion to its `common` weight among the items that take part. Its
+    chance is therefore its share of the weight averaged over every set of
+    rare items that can take part, which is worked out from the distribution
+    of their total weight.
+    """
+    import numpy as np
+    items = [a for a in items if a.dungeons[0] <= level <= a.dungeons[1]]
+    base = sum(a.common for a in items if a.rarity == 1)
+    rare = [a for a in items if a.rarity > 1]
+    size = sum(a.common for a in rare) + 1
+
+    def weight_distribution(exclude=None):
+        dist = np.zeros(size)
+        dist[0] = 1
+        for a in rare:
+            if a is not exclude:
+                p = 1 / a.rarity
+                dist[a.common:] = dist[a.common:] * (1 - p) + dist[:size - a.common] * p
+                dist[:a.common] *= 1 - p
+        return dist
+
+    totals = np.arange(size) + base
+    common_dist = weight_distribution()
+    weights = []
+    for a in items:
+        if a.rarity == 1:
+            dist, total = common_dist, totals
         else:
-            n -= item.common
-    return choice(items)
+            dist, total = weight_distribution(a), totals + a.common
+        share = np.divide(a.common, total, out=np.zeros(size), where=total > 0)
+        weights.append(float((dist * share).sum()) / a.rarity)
+    return items, weights
+
+
+_level_tables = {}
+
+
+def random_by_level(level, items):
+    key = (id(items), len(items), level)
+    table = _level_tables.get(key)
+    if table is None:
+        from utils.random_help import AliasTable
+        found, weights = level_weights(level, items)
+        table = _level_tables[key] = found, AliasTable(weights)
+    found, alias = table
+    return found[alias.draw()]
 
 def array(w, h, func):
     def line():
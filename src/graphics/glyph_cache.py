@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pygame
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return 'hits: %d, misses: %d, size: %d, hit rate: %.1f%%' % \
+            (self.hits, self.misses, self.size, self.hit_rate * 100)
+
+
+class GlyphCache:
+    """
+    Cache of rendered text surfaces keyed by (text, color, background color).
+
+    Single characters (map cells) live in their own table: the set of glyphs
+    and colors on a level is small, so it is only flushed when it overflows.
+    Longer strings are kept in an LRU table.
+    """
+
+    def __init__(self, font: pygame.font.Font, capacity: int = 2048, glyph_capacity: int = 4096):
+        self.font = font
+        self.capacity = capacity
+        self.glyph_capacity = glyph_capacity
+        self.__glyphs = dict()
+        self.__texts = OrderedDict()
+        self.glyph_hits = self.glyph_misses = 0
+        self.text_hits = self.text_misses = 0
+
+    def render(self, text: str, color, bkcolor) -> pygame.Surface:
+        key = (text, tuple(color), tuple(bkcolor))
+        if len(text) == 1:
+            surface = self.__glyphs.get(key)
+            if surface is not None:
+                self.glyph_hits += 1
+                return surface
+            self.glyph_misses += 1
+            if len(self.__glyphs) >= self.glyph_capacity:
+                self.__glyphs.clear()
+            surface = self.__glyphs[key] = self.font.render(text, True, color, bkcolor)
+            return surface
+
+        surface = self.__texts.get(key)
+        if surface is not None:
+            self.text_hits += 1
+            self.__texts.move_to_end(key)
+            return surface
+        self.text_misses += 1
+        surface = self.__texts[key] = self.font.render(text, True, color, bkcolor)
+        if len(self.__texts) > self.capacity:
+            self.__texts.popitem(last=False)
+        return surface
+
+    def glyph_info(self) -> CacheInfo:
+        return CacheInfo(self.glyph_hits, self.glyph_misses, len(self.__glyphs))
+
+    def text_info(self) -> CacheInfo:
+        return CacheInfo(self.text_hits, self.text_misses, len(self.__texts))
+
+    def clear(self) -> None:
+        self.__glyphs.clear()
+        self.__texts.clear()
@@ -84,6 +84,54 @@ class AscendCommand(DebugCommand):
         return []
 
 
+class GlyphsCommand(DebugCommand):
+    def run(self, *args):
+        from common.game import message
+        from graphics.window import Window
+        glyphs = Window.instance().glyphs
+        message('Glyph cache: %s.' % glyphs.glyph_info())
+        message('Text cache: %s.' % glyphs.text_info())
+
+    def auto_complete_arg(self, value: str, index: int) -> List[str]:
+        return []
+
+
+class InputCommand(DebugCommand):
+    def run(self, *args):
+        from common.game import GAME, message
+        source = getattr(GAME.input, 'source', GAME.input)  # under a journal
+        stats = getattr(source, 'stats', None)
+        message('Input: %s.' % stats if stats else 'Input: no idle statistics.')
+
+    def auto_complete_arg(self, value: str, index: int) -> List[str]:
+        return []
+
+
+class ProfileCommand(DebugCommand):
+    args_count = 1
+    ACTIONS = ['on', 'off', 'dump']
+
+    def run(self, *args):
+        from common.constants import PROFILE_FILE
+        from common.game import message
+        from common.profiler import PROFILER
+        action = args[0].lower() if args else ''
+        if action == 'on':
+            PROFILER.enable()
+            PROFILER.dump_at_exit(PROFILER.dump_prefix or PROFILE_FILE)
+            message('Profiling on.')
+        elif action == 'off':
+            PROFILER.disable()
+            message('Profiling off.')
+        elif action == 'dump':
+            prefix = PROFILER.dump_prefix or PROFILE_FILE
+            PROFILER.dump(prefix)
+            message('Profile written to %s.json and %s.folded.' % (prefix, prefix))
+
+    def auto_complete_arg(self, value: str, index: int) -> List[str]:
+        return self.ACTIONS if index == 0 else []
+
+
 class DebugScene(Scene):
     def __init__(self):
         super().__init__()
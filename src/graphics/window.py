@@ -1,25 +1,44 @@
 from typing import Optional, List
 
+import numpy as np
 import pygame
 import tcod as T
 
+from .glyph_cache import GlyphCache
 from .size import Size
 
 
 class Window:
+    """
+    Double-buffered text console.
+
+    `out` only writes (char, color, background) cells into the back buffer.
+    `refresh` compares it with what is on screen, renders the runs of
+    changed cells and updates just their rectangles on the display.
+    """
     __instance: Optional['Window'] = None
+    BLANK = (' ', tuple(T.white), tuple(T.black))
+    headless = False
 
     def __init__(self, width: int, height: int, font: pygame.font.Font):
         self.font = font
+        self.glyphs = GlyphCache(font)
         _txt = font.render("W", True, T.white)
         self.size: Size = Size(width, height)
         self.font_size: Size = Size(_txt.get_width(), _txt.get_height() + 1)
         self.screen = pygame.display.set_mode((self.size.Width * self.font_size.Width,
                                                self.size.Height * self.font_size.Height))
-        Window.__instance = self
+        self.back = [self.BLANK] * (width * height)
+        self.front = [None] * (width * height)
+        self.__dirty_rects = []
+        self.__full_update = False
+        self._set_instance()
 
     def __del__(self): __instance = None
 
+    def _set_instance(self) -> None:
+        Window.__instance = self
+
     @classmethod
     def instance(cls) -> Optional['Window']: return cls.__instance
 
@@ -34,23 +53,153 @@ class Window:
     icon = property(fset=set_icon)
 
     def clear(self) -> None:
-        self.screen.fill(T.black)
+        self.back = [self.BLANK] * (self.size.Width * self.size.Height)
+
+    def flush(self) -> None:
+        """
+        Render the changed cells of the back buffer onto the screen surface
+        without updating the display.
+        """
+        width, height = self.size
+        cell_w, cell_h = self.font_size
+        back, front = self.back, self.front
+        for y in range(height):
+            row = y * width
+            x = 0
+            while x < width:
+                cell = back[row + x]
+                if cell == front[row + x]:
+                    x += 1
+                    continue
+                # Collect a run of changed cells sharing the same colors.
+                _, color, bkcolor = cell
+                start = x
+                text = ''
+                while x < width:
+                    cell = back[row + x]
+                    if cell == front[row + x] or cell[1] != color or cell[2] != bkcolor:
+                        break
+                    text += cell[0]
+                    front[row + x] = cell
+                    x += 1
+                rect = pygame.Rect(start * cell_w, y * cell_h, len(text) * cell_w, cell_h)
+                self.screen.fill(T.black, rect)
+                self.screen.blit(self.glyphs.render(text, color, bkcolor), rect)
+                self.__dirty_rects.append(rect)
 
     def refresh(self) -> None:
-        pygame.display.flip()
+        if self.__full_update:
+            # The surface holds a frame drawn directly: show it as it is and
+            # repaint every cell on the next refresh.
+            pygame.display.flip()
+            self.repaint()
+            self.__full_update = False
+        else:
+            self.flush()
+            if self.__dirty_rects:
+                pygame.display.update(self.__dirty_rects)
+        self.__dirty_rects = []
+
+    def repaint(self) -> None:
+        """
+        Render every cell on the next refresh, changed or not.
+        """
+        self.front = [None] * (self.size.Width * self.size.Height)
+
+    def invalidate(self) -> None:
+        """
+        Somebody is about to draw on the screen surface directly: render the
+        cells written so far under it and show the whole surface on the next
+        refresh.
+        """
+        self.flush()
+        self.__full_update = True
 
     def out(self, x, y, text, color=T.white, bkcolor=T.black, w=0) -> None:
-        _txt = self.font.render(str(text), True, color, bkcolor)
+        width, height = self.size
+        if not 0 <= y < height:
+            return
+        text = str(text)
+        cell = (tuple(color), tuple(bkcolor))
+        if len(text) == 1 and x != 0 and w == 0:
+            if 0 <= x < width:
+                self.back[y * width + x] = (text,) + cell
+            return
         if x == 0:
-            self.screen.blit(_txt, (
-                int((self.size.Width - (_txt.get_width() / self.font_size.Width)) / 2) * self.font_size.Width,
-                y * self.font_size.Height))
+            x = int((width - len(text)) / 2)
         elif w != 0:
-            self.screen.blit(_txt,
-                        ((x + int((w - (_txt.get_width() / self.font_size.Width)) / 2)) * self.font_size.Width,
-                         y * self.font_size.Height))
-        else:
-            self.screen.blit(_txt, (x * self.font_size.Width, y * self.font_size.Height))
+            x += int((w - len(text)) / 2)
+        row = y * width
+        for i, c in enumerate(text):
+            if 0 <= x + i < width:
+                self.back[row + x + i] = (c,) + cell
+
+
+    def out_block(self, x, y, chars, colors, bkcolor=T.black) -> None:
+        """
+        Write a block of cells at once: `chars` and `colors` are arrays
+        indexed [x, y] (and a color axis), as the maps keep them.
+        """
+        width = self.size.Width
+        w, h = chars.shape
+        bkcolor = tuple(bkcolor)
+        # One cell tuple per distinct (char, color), shared by all its cells.
+        codes = (chars.view(np.uint32).astype(np.int64) << 24) | \
+                (colors[..., 0].astype(np.int64) << 16) | (colors[..., 1].astype(np.int64) << 8) | colors[..., 2]
+        unique, inverse = np.unique(codes.T, return_inverse=True)
+        cells = [(chr(code >> 24), ((code >> 16) & 255, (code >> 8) & 255, code & 255), bkcolor)
+                 for code in unique.tolist()]
+        inverse = inverse.reshape(h, w).tolist()
+        w = min(w, width - x)
+        for row in range(min(h, self.size.Height - y)):
+            start = (y + row) * width + x
+            self.back[start:start + w] = [cells[i] for i in inverse[row][:w]]
+
+
+class NullWindow(Window):
+    """
+    Window of a headless game: keeps the console size, draws nothing.
+    """
+    headless = True
+
+    def __init__(self, width: int, height: int):
+        self.font = None
+        self.glyphs = None
+        self.screen = None
+        self.size: Size = Size(width, height)
+        self.font_size: Size = Size(1, 1)
+        self._set_instance()
+
+    def set_title(self, text: str) -> None:
+        pass
+
+    title = property(fset=set_title)
+
+    def set_icon(self, path: str) -> None:
+        pass
+
+    icon = property(fset=set_icon)
+
+    def clear(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        pass
+
+    def repaint(self) -> None:
+        pass
+
+    def invalidate(self) -> None:
+        pass
+
+    def out(self, x, y, text, color=T.white, bkcolor=T.black, w=0) -> None:
+        pass
+
+    def out_block(self, x, y, chars, colors, bkcolor=T.black) -> None:
+        pass
 
 
 def out(x, y, text, color=T.white, bkcolor=T.black, w=0):
@@ -82,7 +231,9 @@ def out_text(x: int, y: int, width: int, text, color=T.white, bkcolor=T.black, w
 
 
 def get_scr():
-    return Window.instance().screen
+    window = Window.instance()
+    window.invalidate()
+    return window.screen
 
 
 def out_file(x, y, filepath, color=T.white, bkcolor=T.black, w=0):
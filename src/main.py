@@ -1,7 +1,9 @@
 import sys
 
+from common.constants import SAVE_FILE
 from common.game_class import Game
 
 if __name__ == '__main__':
     wizard = 'wizard' in sys.argv
-    Game(True).play()
+    journal = sys.argv[sys.argv.index('--journal') + 1] if '--journal' in sys.argv else None
+    Game(True, save_path=SAVE_FILE, journal_path=journal).play()
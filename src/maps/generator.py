@@ -1,110 +1,128 @@
+import numpy as np
 import tcod as T
 from maps.tiles import *
+from maps.tile_grid import TileGrid, NoEmptyTile, type_id
 from common.utils import *
 from common.game import MAX_DLEVEL
 from common.constants import MAP_W, MAP_H
+from common.rng import game_seed
+from maps import level_cache
+
+# Bump whenever a change makes the same seed produce a different layout:
+# it invalidates the level cache.
+GENERATOR_VERSION = 1
+
+FLOOR = type_id(FloorTile)
+WOOD_WALL = type_id(WoodWallTile)
+WALL = type_id(WallTile)
+STAIR_UP = type_id(StairUpTile)
+
+
+class Occupancy(object):
+    """
+    Summed-area table of the cells that are not solid wall: tells in O(1)
+    whether a rectangle of the map is still untouched.
+    """
+
+    def __init__(self, grid):
+        self.sat = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int32)
+        self.update(grid)
+
+    def update(self, grid):
+        np.cumsum(np.cumsum(grid != WALL, axis=0), axis=1, out=self.sat[1:, 1:])
+
+    def add(self, x, y, w, h):
+        """
+        Account for a room stamped on an empty rectangle without rebuilding
+        the table: every sum below and to the right of its corner grows by
+        the part of the room it covers.
+        """
+        sat = self.sat
+        xs = np.minimum(np.arange(1, sat.shape[0] - x), w)
+        ys = np.minimum(np.arange(1, sat.shape[1] - y), h)
+        sat[x + 1:, y + 1:] += np.outer(xs, ys).astype(np.int32)
+
+    def count(self, x, y, w, h):
+        item = self.sat.item
+        return item(x + w, y + h) - item(x, y + h) - item(x + w, y) + item(x, y)
 
 
 class MapGenerator(object):
 
     def __init__(self):
-        pass
-        
-    def generate(self, level):
+        self.rooms = []
 
-        arr = array(MAP_W, MAP_H, lambda: ' ')
+    def generate(self, level):
+        cache = level_cache.active()
+        if cache:
+            cached = cache.load(game_seed(), level, GENERATOR_VERSION)
+            if cached:
+                grid, self.rooms = cached
+                return TileGrid(grid)
+        grid = self.build(level)
+        if cache:
+            cache.store(game_seed(), level, GENERATOR_VERSION, grid, self.rooms)
+        return TileGrid(grid)
+
+    def build(self, level):
+        grid = np.full((MAP_W, MAP_H), WALL, dtype=np.uint8)
+        occupancy = Occupancy(grid)
         rooms = []
         for i in range(500):
             w, h = randrange(5, 15), randrange(5, 10)
-            room = self.try_put_room(arr, w, h)
+            room = self.try_put_room(grid, occupancy, w, h)
             if room:
                 rooms.append(room)
+        self.rooms = rooms
 
         if level < MAX_DLEVEL and level != 3 and level != 6 and level != 9:
-            self.randomly_place(arr, StairUpTile.glyph[0])
+            self.randomly_place(grid, STAIR_UP)
 
         costs = [(5, 40, 1),
                 (5, 1, 2),
                 (5, 40, 40)][3 * level // (MAX_DLEVEL + 1)]
 
-        def corridor_path_func(x1, y1, x2, y2, data):
-            if x2 == 0 or x2 == MAP_W-1 or y2 == 0 or y2 == MAP_H-1:
-                return 0
-            c = arr[x2][y2]
-            if c == ' ':
-                return costs[0]
-            elif c == '#':
-                return costs[1]
-            else:
-                return costs[2]
-
-        path = T.path_new_using_function(
-            MAP_W, MAP_H, corridor_path_func, None, 0.0)
+        # Cost of carving through each cell; the map border is never dug.
+        cost = np.full(grid.shape, costs[2], dtype=np.uint8)
+        cost[grid == WALL] = costs[0]
+        cost[grid == WOOD_WALL] = costs[1]
+        cost[[0, -1], :] = 0
+        cost[:, [0, -1]] = 0
+        # AStar reads the cost array in place, so carved cells get cheaper
+        # for the next corridors.
+        path = T.path.AStar(cost, diagonal=0)
 
         def connect(x1, y1, x2, y2):
-            T.path_compute(path, x1, y1, x2, y2)
-            for i in range(T.path_size(path)):
-                x, y = T.path_get(path, i)
-                c = arr[x][y]
-                if c == '#' or c == ' ':
-                    arr[x][y] = '.'
+            cells = path.get_path(x1, y1, x2, y2)
+            if cells:
+                xs, ys = np.array(cells).T
+                carved = (grid[xs, ys] == WALL) | (grid[xs, ys] == WOOD_WALL)
+                grid[xs[carved], ys[carved]] = FLOOR
+                cost[xs, ys] = costs[2]
 
         for i in range(len(rooms)-1):
             x1, y1, w1, h1 = rooms[i]
             x2, y2, w2, h2 = rooms[i+1]
             connect(x1+w1//2, y1+h1//2, x2+w2//2, y2+h2//2)
 
-        T.path_delete(path)
+        return grid
 
-        return self.array_to_tiles(arr)
-
-    def array_to_tiles(self, arr):
-        TILE_TABLE = {
-            '.': FloorTile,
-            '#': WoodWallTile,
-            ' ': WallTile,
-            '>': StairDownTile,
-            '<': StairUpTile,
-            }
-        return [[TILE_TABLE[c]() for c in line] for line in arr]
-
-    def try_put_room(self, arr, w, h):
+    def try_put_room(self, grid, occupancy, w, h):
         x1, y1 = randrange(MAP_W-w), randrange(MAP_H-h)
-        for x in range(x1, x1+w):
-            for y in range(y1, y1+h):
-                if arr[x][y] != ' ':
-                    return None
-        for x in range(x1, x1+w):
-            for y in range(y1, y1+h):
-                arr[x][y] = '.'
-        for x in range(x1, x1+w):
-            arr[x][y1] = '#'
-            arr[x][y1+h-1] = '#'
-        for y in range(y1, y1+h):
-            arr[x1][y] = '#'
-            arr[x1+w-1][y] = '#'
+        if occupancy.count(x1, y1, w, h):
+            return None
+        grid[x1:x1+w, y1:y1+h] = WOOD_WALL
+        grid[x1+1:x1+w-1, y1+1:y1+h-1] = FLOOR
+        occupancy.add(x1, y1, w, h)
         return (x1, y1, w, h)
 
-    def print_array(self, arr):
-        for y in range(len(arr[0])):
-            for line in arr:
-                stdout.write(line[y])
-            stdout.write('\n')
-
-    def randomly_place(self, arr, c):
-        x, y = self.random_empty_space(arr)
-        arr[x][y] = c
-
-    def random_empty_space(self, arr):
-        while True:
-            x, y = randrange(MAP_W), randrange(MAP_H)
-            if arr[x][y] == '.':
-                return (x, y)
-
-
-
-
-
-
-
+    def randomly_place(self, grid, tile_id):
+        x, y = self.random_empty_space(grid)
+        grid[x, y] = tile_id
 
+    def random_empty_space(self, grid):
+        cells = np.argwhere(grid == FLOOR)
+        if len(cells) == 0:
+            raise NoEmptyTile()
+        x, y = choice(cells)
+        return int(x), int(y)
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+import numpy as np
+
+# Directory of the cache, off unless set.
+CACHE_DIR_VARIABLE = 'TROLLS_LEVEL_CACHE'
+MAX_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class LevelCache(object):
+    """
+    Generated level layouts on disk, keyed by (seed, level, generator version).
+
+    Each entry is a small uncompressed .npz with the tile type array and the
+    room list. The oldest entries (by last use) are evicted once the cache
+    grows past `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def entry_path(self, seed, level, version):
+        return os.path.join(self.path, 'level-%d-%d-v%d.npz' % (seed, level, version))
+
+    def load(self, seed, level, version):
+        """
+        :return: (types, rooms) or None if the level is not cached.
+        """
+        path = self.entry_path(seed, level, version)
+        try:
+            with np.load(path) as data:
+                types, rooms = data['types'], data['rooms']
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return types, [tuple(int(v) for v in room) for room in rooms]
+
+    def store(self, seed, level, version, types, rooms):
+        # Written to a temporary file first: levels are also built on the
+        # pregenerator thread and a half-written entry must never be read.
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, types=types, rooms=np.array(rooms, dtype=np.int16).reshape(-1, 4))
+        os.replace(tmp, self.entry_path(seed, level, version))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith('.npz'):
+                try:
+                    st = os.stat(os.path.join(self.path, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for mtime, size, name in entries)
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            total -= size
+
+
+_cache = None
+
+
+def configure(path, max_bytes=MAX_CACHE_BYTES):
+    """
+    Turn the cache on (or off with a None path).
+    """
+    global _cache
+    _cache = LevelCache(path, max_bytes) if path else None
+
+
+def active():
+    return _cache
+
+
+configure(os.environ.get(CACHE_DIR_VARIABLE))
@@ -1,60 +1,152 @@
+import numpy as np
+
 from mobs.mobs import *
 from items.items import *
 from items.light_sources import *
 from items.keys import *
 from maps.objects import *
+from maps.scheduler import Scheduler
+from common.constants import ACTIVITY_RADIUS
+from common.rng import stream
+
+UNREACHABLE = np.iinfo(np.int32).max
+
 
 class Map(object):
-    def __init__(self, level):
+    def __init__(self, level, populate=True, tiles=None):
+        """
+        :param tiles: grid of a level loaded from a save, used instead of
+            generating one.
+        """
         from maps.generator import MapGenerator
         self.generator = MapGenerator()
-        self.tiles = self.generator.generate(level)
+        if tiles is None:
+            with stream('mapgen', level):
+                tiles = self.generator.generate(level)
+        self.tiles = tiles
         self.level = level
 
         self.player = None
         self.mobs = []
-
-        self.fov_map = T.map_new(MAP_W, MAP_H)
-        for x in range(MAP_W):
-            for y in range(MAP_H):
-                tile = self.tiles[x][y]
-                T.map_set_properties(self.fov_map,
-                                           x, y,
-                                           tile.transparent,
-                                           tile.walkable)
-
-        self.populate()
-        
-        if self.level == 3:
-            self.place_monsters(FireGoblin)
-        elif self.level == 6:
-            self.place_monsters(Werewolf)
-        elif self.level == 9:
-            self.place_monsters(Abomination)
-        elif self.level == MAX_DLEVEL:
-            self.place_monsters(TrollKing)
-
-    def find_tile(self, func):
-        for x in range(MAP_W):
-            for y in range(MAP_H):
-                tile = self.tiles[x][y]
-                if func(tile):
-                    return (x, y, tile)
+        self.scheduler = Scheduler()
+
+        self.fov = np.zeros(self.tiles.shape, dtype=bool)
+        self.visible = np.zeros(self.tiles.shape, dtype=bool)
+        self.lit = np.zeros(self.tiles.shape, dtype=bool)
+        self.fov_window = None
+        self.activity_radius = ACTIVITY_RADIUS
+        self.flow_fields = {}
+        self.sight_range = max(mcls.fov_range for mcls in Monster.ALL)
+
+        if populate:
+            self.populate_level()
+
+    def populate_level(self):
+        with stream('population', self.level):
+            self.populate()
+            if self.level == 3:
+                self.place_monsters(FireGoblin)
+            elif self.level == 6:
+                self.place_monsters(Werewolf)
+            elif self.level == 9:
+                self.place_monsters(Abomination)
+            elif self.level == MAX_DLEVEL:
+                self.place_monsters(TrollKing)
+
+    def find_tile(self, tile_cls):
+        cell = self.tiles.find(tile_cls)
+        if cell:
+            x, y = cell
+            return (x, y, self.tiles[x][y])
+
+    def distances(self, x, y, window=(slice(None), slice(None))):
+        xs, ys = np.ogrid[:self.tiles.width, :self.tiles.height]
+        dx, dy = np.abs(xs[window[0]] - x), np.abs(ys[:, window[1]] - y)
+        return (dx + dy + np.maximum(dx, dy)) / 2
+
+    def visible_cells(self):
+        """
+        :return: mask of the cells the player sees, valid until the next FOV change.
+        """
+        return self.visible
+
+    def lit_cells(self):
+        """
+        :return: mask of the visible cells inside the player's light range.
+        """
+        return self.lit
+
+    def fov_radius(self):
+        player = self.player
+        return int(max(player.fov_range + player.radius,
+                       self.sight_range + player.light_range / 2)) + 1
 
     def recalc_fov(self):
-        T.map_compute_fov(self.fov_map,
-                                self.player.x, self.player.y,
-                                MAP_W,
-                                True)
-        for x in range(MAP_W):
-            for y in range(MAP_H):
-                if self.is_visible(x, y):
-                    self.tiles[x][y].remember_glyph()
+        # Only the square around the player that the FOV radius can reach is
+        # computed; monsters use the same FOV to spot the player, so the
+        # radius also covers the sharpest monster eyes.
+        player = self.player
+        r = self.fov_radius()
+        x0, y0 = max(player.x - r, 0), max(player.y - r, 0)
+        x1, y1 = min(player.x + r + 1, self.tiles.width), min(player.y + r + 1, self.tiles.height)
+        window = (slice(x0, x1), slice(y0, y1))
+
+        if self.fov_window:
+            self.fov[self.fov_window] = False
+            self.visible[self.fov_window] = False
+            self.lit[self.fov_window] = False
+        self.fov_window = window
+
+        fov = T.map.compute_fov(self.tiles.transparent[window],
+                                (player.x - x0, player.y - y0),
+                                radius=r, light_walls=True,
+                                algorithm=T.FOV_RESTRICTIVE)
+        d = self.distances(player.x, player.y, window)
+        visible = fov & (d <= player.fov_range + player.radius)
+        self.fov[window] = fov
+        self.visible[window] = visible
+        self.lit[window] = visible & (d <= player.light_range + 1)
+        self.tiles.remember(visible, (x0, y0))
+        self.wake_monsters()
+
+    def wake_monsters(self):
+        # Monsters that could see the player must not be dozing.
+        player = self.player
+        r = self.activity_radius = max(ACTIVITY_RADIUS, self.fov_radius())
+        x0, y0 = max(player.x - r, 0), max(player.y - r, 0)
+        for x, y in np.argwhere(self.tiles.mob[x0:player.x + r + 1, y0:player.y + r + 1]):
+            x, y = int(x) + x0, int(y) + y0
+            mob = self.tiles.mobs[x, y]
+            if mob.dormant and dist(x, y, player.x, player.y) <= r:
+                mob.dormant = False
+                mob.reschedule()
+
+    def flow_field(self, through_walls=False):
+        """
+        :return: array of step counts from every cell to the player, shared
+            by all pursuing monsters. Computed lazily once per player
+            position; `through_walls` is the variant for monsters that
+            enter walls.
+        """
+        player = self.player
+        cached = self.flow_fields.get(through_walls)
+        if cached and cached[0] == (player.x, player.y):
+            return cached[1]
+        if through_walls:
+            cost = np.ones(self.tiles.shape, dtype=np.int8)
+        else:
+            cost = self.tiles.walkable.astype(np.int8)
+        field = np.full(self.tiles.shape, UNREACHABLE, dtype=np.int32)
+        field[player.x, player.y] = 0
+        T.path.dijkstra2d(field, cost, 1, 1, out=field)
+        self.flow_fields[through_walls] = ((player.x, player.y), field)
+        return field
 
     def is_visible(self, x, y):
-        return T.map_is_in_fov(self.fov_map, x, y) and \
-            dist(x, y, self.player.x, self.player.y) <= \
-            self.player.fov_range + self.player.radius
+        return bool(self.visible[x, y])
+
+    def is_lit(self, x, y):
+        return bool(self.lit[x, y])
 
     def neighbor_tiles(self, x, y):
         for dx, dy in ALL_DIRS:
@@ -62,15 +154,11 @@ class Map(object):
                 yield self.tiles[x+dx][y+dy]
 
     def do_turn(self, t):
-        for mob in self.mobs:
-            mob.heartbeat()
-            if mob.speed < 0 and \
-                    t % (6 + max(mob.speed, MIN_SPEED)) == 0:
-                continue
+        # Only the player keeps a per-tick clock (the light source).
+        if self.player:
+            self.player.heartbeat()
+        for mob in self.scheduler.due(t):
             mob.act()
-            if mob.speed > 0 and \
-                    t % (6 - min(mob.speed, MAX_SPEED)) == 0:
-                mob.act()
 
     def populate(self):
         n_monsters = 3 + roll(2, self.level)
@@ -99,7 +187,7 @@ class Map(object):
     def flood(self, x, y, mcls, n):
         if n == 0:
             return n
-        if x < 0 or x >= MAP_W or y < 0 or y >= MAP_H:
+        if not self.in_map(x, y):
             return n
         tile = self.tiles[x][y]
         if tile.mob or not tile.walkable:
@@ -118,21 +206,16 @@ class Map(object):
 
     def random_empty_tile(self, no_mob=True, not_seen=False, no_stair=False):
         from maps.tiles import StairUpTile
-        while True:
-            x, y = randrange(MAP_W), randrange(MAP_H)
-            tile = self.tiles[x][y]
-            if not tile.walkable:
-                continue
-            if no_mob and tile.mob:
-                continue
-            if not_seen and self.is_visible(x, y):
-                continue
-            if no_stair and isinstance(tile, StairUpTile):
-                continue
-            return (x, y, tile)
+        exclude = []
+        if not_seen:
+            exclude.append(self.visible)
+        if no_stair:
+            exclude.append(self.tiles.cells_of(StairUpTile))
+        x, y = self.tiles.random_cell(no_mob, exclude)
+        return (x, y, self.tiles[x][y])
 
     def in_map(self, x, y):
-        return 0 <= x < MAP_W and 0 <= y < MAP_H
+        return 0 <= x < self.tiles.width and 0 <= y < self.tiles.height
 
     def place_item(self, item):
         x, y, tile = self.random_empty_tile()
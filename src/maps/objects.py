@@ -1,6 +1,7 @@
 import tcod as T
 from common.game import *
 from graphics.color import Color
+from common.rng import stream
 
 # --- MAP OBJECT --- #
 
@@ -145,7 +146,8 @@ class Container(MapObject):
                     return
             self.used = True
             message('You open a %s.' % self.name, Color.ALERT.value)
-            self.on_drop(self.player)
+            with stream('loot'):
+                self.on_drop(self.player)
         else:
             message('The %s is already open.' % self.name, Color.ERROR.value)
 
@@ -171,7 +173,8 @@ class Container(MapObject):
             self.broken = True
             message('You broke the %s.' % self.name, Color.ALERT.value)
             player.tile.obj = None
-            self.on_drop(player)
+            with stream('loot'):
+                self.on_drop(player)
         
 
 class WoodenBox(Container):
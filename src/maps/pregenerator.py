@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from common.game import MAX_DLEVEL
+
+
+class Pregenerator(object):
+    """
+    Builds the next dungeon level on a worker thread while the player is
+    still on the current one.
+
+    A level does not depend on the player until the player is put on it
+    (drops and chest contents are rolled when they happen), so it can be
+    generated and populated ahead of time as a whole.
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pregenerator') \
+            if background else None
+        self.pending = {}
+
+    def prepare(self, level):
+        if self.background and level <= MAX_DLEVEL and level not in self.pending:
+            from maps.map import Map
+            self.pending[level] = self.executor.submit(Map, level)
+
+    def take(self, level):
+        """
+        :return: the map of the given level, waiting for it if it is still
+            being built and building it right away if it was not prepared.
+        """
+        from maps.map import Map
+        future = self.pending.pop(level, None)
+        for other in self.pending.values():
+            other.cancel()
+        self.pending.clear()
+        if future is None:
+            return Map(level)
+        return future.result()
+
+    def shutdown(self):
+        # A level still being built draws from the random streams; it has to
+        # be done before another game reseeds them.
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,105 @@
+import heapq
+from itertools import count
+
+from common.game import MIN_SPEED, MAX_SPEED
+from common.constants import DORMANT_SLOWDOWN
+
+# Time is counted in integer units so that every action delay is exact.
+TICK = 60
+
+
+def action_delay(speed):
+    """
+    :return: time units between two actions of a mob with the given speed.
+
+    Matches the old per-tick rules: a fast mob acts once more every
+    (6 - speed) ticks, a slow one skips an action every (6 + speed) ticks.
+    """
+    if speed > 0:
+        speed = min(speed, MAX_SPEED)
+        return TICK * (6 - speed) // (7 - speed)
+    if speed < 0:
+        speed = max(speed, MIN_SPEED)
+        return TICK * (6 + speed) // (5 + speed)
+    return TICK
+
+
+def mob_delay(mob):
+    delay = action_delay(mob.speed)
+    return delay * DORMANT_SLOWDOWN if mob.dormant else delay
+
+
+class Scheduler(object):
+    """
+    Mobs of a map ordered by the time of their next action.
+
+    Entries of removed or rescheduled mobs stay in the heap and are skipped
+    when they come up.
+    """
+
+    def __init__(self):
+        self.queue = []
+        self.entries = {}
+        self.last = {}
+        self.now = 0
+        self.__seq = count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, mob):
+        return mob in self.entries
+
+    def __push(self, mob, time):
+        seq = next(self.__seq)
+        self.entries[mob] = seq
+        heapq.heappush(self.queue, (time, seq, mob))
+
+    def add(self, mob):
+        self.last[mob] = self.now - mob_delay(mob)
+        self.__push(mob, self.now)
+
+    def remove(self, mob):
+        self.entries.pop(mob, None)
+        self.last.pop(mob, None)
+
+    def reschedule(self, mob):
+        """
+        Move the next action of the mob after its speed or activity has changed.
+        """
+        if mob in self.entries:
+            self.__push(mob, max(self.now, self.last[mob] + mob_delay(mob)))
+
+    def timetable(self):
+        """
+        :return: (mob, time of its next action, time of its last action) of
+            every scheduled mob, in the order they act.
+        """
+        live = sorted(entry for entry in self.queue if self.entries.get(entry[2]) == entry[1])
+        return [(mob, time, self.last[mob]) for time, seq, mob in live]
+
+    def restore(self, now, timetable):
+        """
+        Schedule the mobs of a loaded map as `timetable` lists them.
+        """
+        self.now = now
+        for mob, time, last in timetable:
+            self.last[mob] = last
+            self.__push(mob, time)
+
+    def due(self, t):
+        """
+        Yield the mobs that act during tick `t`, in order, once per action.
+        """
+        self.now = t * TICK
+        end = self.now + TICK
+        queue, entries = self.queue, self.entries
+        while queue and queue[0][0] < end:
+            time, seq, mob = heapq.heappop(queue)
+            if entries.get(mob) != seq:
+                continue
+            # Mobs added on a map the game left a while ago start from now.
+            time = max(time, self.now)
+            self.last[mob] = time
+            self.__push(mob, time + mob_delay(mob))
+            yield mob
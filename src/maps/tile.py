@@ -1,37 +1,75 @@
 import tcod as T
 
-class Tile(object):
+from common.utils import Register
+
+
+class Tile(object, metaclass=Register):
+    """
+    Lightweight view of a single cell of a TileGrid.
+
+    All state lives in the arrays and sparse tables of the grid, so views
+    can be created on demand and thrown away.
+    """
+    ALL = []
+    ABSTRACT = True
+    __slots__ = ('grid', 'x', 'y')
     walkable = True
     transparent = True
     glyph = '?', T.red
-    known_glyph = ' ', T.white
 
-    def __init__(self):
-        self.mob = None
-        self.obj = None
-        self.items = []
+    def __init__(self, grid, x, y):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        return isinstance(other, Tile) and self.grid is other.grid and \
+            self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((id(self.grid), self.x, self.y))
+
+    @property
+    def mob(self):
+        return self.grid.mobs.get((self.x, self.y))
+
+    @mob.setter
+    def mob(self, mob):
+        self.grid.set_mob(self.x, self.y, mob)
+
+    @property
+    def obj(self):
+        return self.grid.objs.get((self.x, self.y))
+
+    @obj.setter
+    def obj(self, obj):
+        self.grid.set_obj(self.x, self.y, obj)
+
+    @property
+    def items(self):
+        return self.grid.items_at(self.x, self.y)
+
+    @property
+    def known_glyph(self):
+        return self.grid.known_glyph(self.x, self.y)
+
+    @known_glyph.setter
+    def known_glyph(self, glyph):
+        self.grid.set_known_glyph(self.x, self.y, glyph)
 
     @property
     def visible_glyph(self):
         from common.game import GAME
-        from mobs.player import Invisibility
-        player = GAME.player
-        if self.mob and not (self.mob == player and player.invisibility == Invisibility.FULL):
-            if self.mob == player and player.invisibility == Invisibility.SHADOW:
-                return self.mob.glyph[0], T.darkest_grey
-            if self.mob.poisoned > 0:
-                return self.mob.glyph[0], T.lighter_green
-            elif self.mob.confused:
-                return self.mob.glyph[0], T.lightest_blue
-            else:
-                return self.mob.glyph
-        elif self.items:
-            return self.items[-1].glyph
+        mob = self.mob
+        if mob:
+            glyph = mob_glyph(mob, GAME.player)
+            if glyph:
+                return glyph
+        items = self.grid.items.get((self.x, self.y))
+        if items:
+            return items[-1].glyph
         elif self.obj:
-            if self.obj.used:
-                return self.obj.glyph[0], T.grey
-            else:
-                return self.obj.glyph
+            return obj_glyph(self.obj)
         else:
             return self.glyph
 
@@ -64,3 +102,27 @@ class Tile(object):
 
 
 
+
+
+def mob_glyph(mob, player):
+    """
+    :return: the glyph a mob is seen as, None for the invisible player.
+    """
+    from mobs.player import Invisibility
+    if mob == player and player.invisibility == Invisibility.FULL:
+        return None
+    if mob == player and player.invisibility == Invisibility.SHADOW:
+        return mob.glyph[0], T.darkest_grey
+    if mob.poisoned > 0:
+        return mob.glyph[0], T.lighter_green
+    elif mob.confused:
+        return mob.glyph[0], T.lightest_blue
+    else:
+        return mob.glyph
+
+
+def obj_glyph(obj):
+    if obj.used:
+        return obj.glyph[0], T.grey
+    else:
+        return obj.glyph
@@ -0,0 +1,289 @@
+import numpy as np
+
+from common.utils import randrange
+from maps.tile import Tile
+from maps.tiles import *
+
+# --- TILE TYPES --- #
+
+TILE_TYPES = tuple(Tile.ALL)
+
+TILE_WALKABLE = np.array([t.walkable for t in TILE_TYPES], dtype=bool)
+TILE_TRANSPARENT = np.array([t.transparent for t in TILE_TYPES], dtype=bool)
+TILE_CHARS = np.array([t.glyph[0] for t in TILE_TYPES], dtype='<U1')
+TILE_COLORS = np.array([tuple(t.glyph[1]) for t in TILE_TYPES], dtype=np.uint8)
+
+
+def type_id(tile_cls):
+    return TILE_TYPES.index(tile_cls)
+
+
+class NoEmptyTile(Exception):
+    pass
+
+
+# --- CELL INDEX --- #
+
+class CellIndex(object):
+    """
+    Set of flat cell numbers with O(1) insertion, removal and random choice.
+    """
+
+    def __init__(self, size, cells=()):
+        cells = np.asarray(cells, dtype=np.int32)
+        self.cells = np.zeros(size, dtype=np.int32)
+        self.pos = np.full(size, -1, dtype=np.int32)
+        self.size = len(cells)
+        self.cells[:self.size] = cells
+        self.pos[cells] = np.arange(self.size, dtype=np.int32)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        return self.pos[cell] >= 0
+
+    def add(self, cell):
+        if self.pos[cell] < 0:
+            self.cells[self.size] = cell
+            self.pos[cell] = self.size
+            self.size += 1
+
+    def discard(self, cell):
+        i = self.pos[cell]
+        if i >= 0:
+            self.size -= 1
+            last = self.cells[self.size]
+            self.cells[i] = last
+            self.pos[last] = i
+            self.pos[cell] = -1
+
+    def choice(self):
+        return int(self.cells[randrange(self.size)])
+
+    def as_array(self):
+        return self.cells[:self.size]
+
+
+# --- ITEMS --- #
+
+class ItemList(list):
+    """
+    Items lying on a single cell. Keeps the item occupancy array of the
+    owning grid in sync with every change, and the grid's table of items
+    down to the cells that have some: the list joins it with its first item
+    and leaves it with its last.
+    """
+
+    def __init__(self, grid, x, y):
+        super().__init__()
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    def __changed(self):
+        grid, key = self.grid, (self.x, self.y)
+        grid.item_count[key] = len(self)
+        if self:
+            grid.items[key] = self
+        elif grid.items.get(key) is self:
+            del grid.items[key]
+
+    def append(self, item):
+        super().append(item)
+        self.__changed()
+
+    def extend(self, items):
+        super().extend(items)
+        self.__changed()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self.__changed()
+
+    def remove(self, item):
+        super().remove(item)
+        self.__changed()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self.__changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.__changed()
+
+
+# --- GRID --- #
+
+class _Column(object):
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.grid.tile(self.x, y)
+
+    def __len__(self):
+        return self.grid.height
+
+
+class TileGrid(object):
+    """
+    Structure-of-arrays storage for a map.
+
+    Arrays are indexed as [x, y], same as the old list-of-lists of tiles, so
+    `grid[x][y]` still returns a Tile (a view) for code working cell by cell.
+    Mobs, objects and items are kept in sparse tables keyed by (x, y) with
+    boolean/count occupancy arrays alongside them.
+    """
+    SAMPLE_TRIES = 16
+
+    def __init__(self, types):
+        self.type = np.asarray(types, dtype=np.uint8)
+        self.walkable = TILE_WALKABLE[self.type]
+        self.transparent = TILE_TRANSPARENT[self.type]
+
+        self.known_char = np.full(self.shape, ' ', dtype='<U1')
+        self.known_color = np.full(self.shape + (3,), 255, dtype=np.uint8)
+
+        self.mob = np.zeros(self.shape, dtype=bool)
+        self.obj = np.zeros(self.shape, dtype=bool)
+        self.item_count = np.zeros(self.shape, dtype=np.uint16)
+
+        self.mobs = {}
+        self.objs = {}
+        self.items = {}
+
+        # Walkable cells with neither a mob nor a map object on them.
+        walkable_cells = np.flatnonzero(self.walkable)
+        self.free = CellIndex(self.type.size, walkable_cells)
+        self.walkable_cells = CellIndex(self.type.size, walkable_cells)
+        self.__type_masks = {}
+
+    @property
+    def shape(self):
+        return self.type.shape
+
+    @property
+    def width(self):
+        return self.type.shape[0]
+
+    @property
+    def height(self):
+        return self.type.shape[1]
+
+    def __getitem__(self, x):
+        return _Column(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def tile(self, x, y):
+        return TILE_TYPES[self.type[x, y]](self, x, y)
+
+    def set_mob(self, x, y, mob):
+        if mob is None:
+            self.mobs.pop((x, y), None)
+        else:
+            self.mobs[x, y] = mob
+        self.mob[x, y] = mob is not None
+        self.__update_free(x, y)
+
+    def set_obj(self, x, y, obj):
+        if obj is None:
+            self.objs.pop((x, y), None)
+        else:
+            self.objs[x, y] = obj
+        self.obj[x, y] = obj is not None
+        self.__update_free(x, y)
+
+    def __update_free(self, x, y):
+        cell = x * self.height + y
+        if self.walkable[x, y] and not self.mob[x, y] and not self.obj[x, y]:
+            self.free.add(cell)
+        else:
+            self.free.discard(cell)
+
+    def random_cell(self, free=True, exclude=()):
+        """
+        Pick a random walkable cell (a free one if `free`) that is not set in
+        any of the `exclude` masks.
+
+        A few cheap draws are tried first; if they all hit excluded cells the
+        candidates are filtered exactly, so the result is guaranteed whenever
+        one exists.
+
+        :raise NoEmptyTile: if there is no such cell.
+        """
+        cells = self.free if free else self.walkable_cells
+        if len(cells) == 0:
+            raise NoEmptyTile()
+        for i in range(self.SAMPLE_TRIES):
+            cell = cells.choice()
+            if not any(mask.flat[cell] for mask in exclude):
+                return divmod(cell, self.height)
+        candidates = cells.as_array()
+        for mask in exclude:
+            candidates = candidates[~mask.ravel()[candidates]]
+        if len(candidates) == 0:
+            raise NoEmptyTile()
+        return divmod(int(candidates[randrange(len(candidates))]), self.height)
+
+    def items_at(self, x, y):
+        """
+        :return: the items on the cell; for an empty cell a new list that is
+            only stored once something is put in it.
+        """
+        items = self.items.get((x, y))
+        return ItemList(self, x, y) if items is None else items
+
+    def known_glyph(self, x, y):
+        return str(self.known_char[x, y]), tuple(int(c) for c in self.known_color[x, y])
+
+    def set_known_glyph(self, x, y, glyph):
+        self.known_char[x, y], self.known_color[x, y] = glyph[0], tuple(glyph[1])
+
+    def remember(self, mask, origin=(0, 0)):
+        """
+        Remember the terrain (or the top item) of every cell in `mask`.
+        `mask` may cover only a window of the grid starting at `origin`.
+        """
+        x0, y0 = origin
+        w, h = mask.shape
+        window = (slice(x0, x0 + w), slice(y0, y0 + h))
+        types = self.type[window][mask]
+        self.known_char[window][mask] = TILE_CHARS[types]
+        self.known_color[window][mask] = TILE_COLORS[types]
+        for x, y in np.argwhere(mask & (self.item_count[window] > 0)):
+            x, y = int(x) + x0, int(y) + y0
+            self.set_known_glyph(x, y, self.items[x, y][-1].glyph)
+
+    def cells_of(self, tile_cls):
+        # Tile types never change after generation, so the masks are cached.
+        mask = self.__type_masks.get(tile_cls)
+        if mask is None:
+            mask = self.__type_masks[tile_cls] = self.type == type_id(tile_cls)
+        return mask
+
+    def find(self, tile_cls):
+        """
+        :return: (x, y) of the first cell of the given type or None.
+        """
+        cells = np.argwhere(self.cells_of(tile_cls))
+        if len(cells) == 0:
+            return None
+        x, y = cells[0]
+        return int(x), int(y)
+
+    @classmethod
+    def from_chars(cls, arr, table):
+        """
+        Build a grid from a list-of-lists of characters and a table that maps
+        each character to a tile class.
+        """
+        ids = dict((c, type_id(tile_cls)) for c, tile_cls in table.items())
+        return cls([[ids[c] for c in line] for line in arr])
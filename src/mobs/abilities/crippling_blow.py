@@ -15,6 +15,7 @@ class CripplingBlow(Ability):
         mob = look_mode(True)
         if mob:
             mob.speed = MIN_SPEED
+            mob.reschedule()
             self.player.mana.modify(-self.need_mana)
             message("You slowed down the %s" % mob.name)
 
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import NamedTuple
 
+from common.rng import in_stream
 from common.utils import rand, roll
 from mobs.mob import Mob
 
@@ -57,6 +58,7 @@ class Damage:
         return '%s: %d' % (self.status, self.value)
 
     @staticmethod
+    @in_stream('combat')
     def calculate(attacker: Mob, defender: Mob):
         damage = Damage()
         damage.attacker = attacker
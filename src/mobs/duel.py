@@ -0,0 +1,234 @@
+"""
+Monte Carlo melee duels, vectorized with NumPy.
+
+Every strike follows Damage.calculate: the evasion roll of check_evasion,
+the block roll of check_blocking, the armor scaling of Mob.calc_damage and
+the 1 in 20 critical hit. Their combined distribution is worked out once
+per pair of fighters (strike_table) and sampled with one random uint16 per
+strike. Both fighters strike at the rate their speed
+gives them in the scheduler (the player first on ties) until one of them
+drops.
+
+Left out: regeneration, poison, effects, abilities, reflected damage,
+ranged attacks and whatever monsters do in their own `act`.
+"""
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from maps.scheduler import TICK, action_delay
+from mobs.damage import DamageStatus, block_chance
+
+# Strikes of the slower fighter simulated at once for each duel still going on.
+BLOCK = 8
+MAX_STRIKES = 10000
+CHUNK = 100000
+# Resolution of the strike outcome probabilities.
+SAMPLES = 2 ** 16
+
+
+class Fighter(NamedTuple):
+    name: str
+    life: int
+    dice: Tuple[int, int, int]
+    accuracy: int
+    evasion: int
+    blocking: int
+    armor: int
+    delay: int
+
+
+def fighter(mob):
+    """
+    :return: the combat statistics of a mob.
+    """
+    a, b, c = mob.dice
+    return Fighter(mob.name, mob.life.max, (a, b, c + mob.damage_bonus), mob.accuracy, mob.evasion, mob.blocking,
+                   mob.armor, action_delay(mob.speed))
+
+
+def outfit(player):
+    """
+    Equip the weapon, armor and shield of the player's starting kit.
+    """
+    for item in list(player.items):
+        if item.slot in ('w', 'o', 'a') and player.equipment[item.slot] is None and item.on_equip(player):
+            player.equipment[item.slot] = item
+    return player
+
+
+def evade_chance(attacker, defender):
+    accuracy = max(attacker.accuracy, 1)
+    evasion = max(defender.evasion, 1)
+    accuracy = accuracy if accuracy > evasion // 20 else evasion // 20
+    evasion = evasion if evasion > accuracy // 20 else accuracy // 20
+    return evasion, evasion + accuracy
+
+
+class StrikeTable(NamedTuple):
+    """
+    Every outcome of a strike: its damage, DamageStatus value and the
+    cumulative probability up to it.
+    """
+    damage: np.ndarray
+    status: np.ndarray
+    cdf: np.ndarray
+
+    @property
+    def mean(self):
+        return float((self.damage * np.diff(self.cdf, prepend=0)).sum())
+
+
+def strike_table(attacker, defender):
+    """
+    :return: the exact distribution of the outcome of a strike.
+
+    A strike is independent of the ones before, so one random number per
+    strike picks its outcome from this table.
+    """
+    a, b, c = attacker.dice
+    raw = np.ones(1)
+    for i in range(a):
+        raw = np.convolve(raw, np.full(b, 1 / b))
+    # raw[i] is the probability of a dice sum of a + i.
+    values = {}
+    for i, p in enumerate(raw):
+        dmg = max(a + i + c, 1)
+        armor = min(defender.armor, 90)
+        if armor > 0:
+            dmg = round(dmg * (100 - armor) / 100)
+        values[dmg] = values.get(dmg, 0) + p
+
+    evasion, total = evade_chance(attacker, defender)
+    evaded = evasion / total
+    blocked = 0
+    if defender.blocking > 0:
+        blocked = (1 - evaded) * min(max(block_chance(defender.blocking), 0), 100) / 100
+    hit = 1 - evaded - blocked
+
+    outcomes = [(0, DamageStatus.EVADED, evaded), (0, DamageStatus.BLOCKED, blocked)]
+    for dmg, p in sorted(values.items()):
+        if dmg > 0:
+            outcomes.append((dmg, DamageStatus.NORMAL, hit * p * 19 / 20))
+            outcomes.append((dmg * 2, DamageStatus.CRITICAL, hit * p / 20))
+        else:
+            outcomes.append((0, DamageStatus.ABSORBED, hit * p))
+    outcomes = [outcome for outcome in outcomes if outcome[2] > 0]
+    cdf = np.cumsum([p for dmg, status, p in outcomes])
+    cdf[-1] = 1.0
+    return StrikeTable(np.array([dmg for dmg, status, p in outcomes], dtype=np.int32),
+                       np.array([status.value for dmg, status, p in outcomes], dtype=np.int8),
+                       cdf)
+
+
+def sampler(table):
+    """
+    :return: the outcome index of each of the SAMPLES equally likely values
+        of a uint16, so that a random uint16 picks an outcome. Every
+        probability is rounded to a multiple of 1 / SAMPLES.
+    """
+    bounds = np.round(table.cdf * SAMPLES).astype(np.int64)
+    return np.repeat(np.arange(len(bounds), dtype=np.uint8), np.diff(bounds, prepend=0))
+
+
+class DuelResult(object):
+    """
+    Outcome of n duels between `first` and `second`. `won` is True where
+    `first` won; `time` is the time of the killing strike in turns, inf for
+    duels nobody won within MAX_STRIKES.
+    """
+
+    def __init__(self, first, second, won, time, tables, counts):
+        self.first = first
+        self.second = second
+        self.won = won
+        self.time = time
+        # The strike tables of `first` and `second`, and how many of their
+        # strikes had each outcome.
+        self.tables = tables
+        self.counts = counts
+
+    @property
+    def n(self):
+        return len(self.won)
+
+    @property
+    def win_rate(self):
+        return self.won.mean()
+
+    @property
+    def draws(self):
+        return int(np.isinf(self.time).sum())
+
+    def kill_time(self, winner=True):
+        """
+        :return: the times to kill of the duels won by `first` (or by `second`).
+        """
+        return self.time[(self.won == winner) & np.isfinite(self.time)]
+
+    def damage_histogram(self, side=0):
+        """
+        :return: {damage: number of strikes} of the strikes of one side.
+        """
+        histogram = {}
+        for dmg, count in zip(self.tables[side].damage, self.counts[side]):
+            histogram[int(dmg)] = histogram.get(int(dmg), 0) + int(count)
+        return histogram
+
+    def mean_damage(self, side=0):
+        counts = self.counts[side]
+        return (self.tables[side].damage * counts).sum() / max(counts.sum(), 1)
+
+    def status_rates(self, side=0):
+        counts = self.counts[side]
+        status = self.tables[side].status
+        return {s.name.lower(): counts[status == s.value].sum() / max(counts.sum(), 1) for s in DamageStatus}
+
+
+def duel(first, second, n, rng=None):
+    """
+    Fight n duels between two Fighters.
+    """
+    rng = rng or np.random.default_rng()
+    tables = strike_table(first, second), strike_table(second, first)
+    samplers = [sampler(table) for table in tables]
+    won, time = [], []
+    counts = [np.zeros(len(table.cdf), dtype=np.int64) for table in tables]
+    for start in range(0, n, CHUNK):
+        chunk_won, chunk_time = _duel_chunk((first, second), tables, samplers, counts, min(CHUNK, n - start), rng)
+        won.append(chunk_won)
+        time.append(chunk_time)
+    return DuelResult(first, second, np.concatenate(won), np.concatenate(time), tables, counts)
+
+
+def _duel_chunk(fighters, tables, samplers, counts, n, rng):
+    # Life left of the fighter each side strikes.
+    life = [np.full(n, fighters[1].life, dtype=np.int32), np.full(n, fighters[0].life, dtype=np.int32)]
+    won = np.zeros(n, dtype=bool)
+    time = np.full(n, np.inf)
+    going = np.arange(n)
+    made = [0, 0]
+    now = 0
+    span = BLOCK * max(fighter.delay for fighter in fighters)
+    while len(going) and sum(made) < MAX_STRIKES:
+        now += span
+        kills = []
+        for side, fighter in enumerate(fighters):
+            k = now // fighter.delay - made[side]
+            outcome = samplers[side][rng.integers(0, SAMPLES, size=(len(going), k), dtype=np.uint16)]
+            counts[side] += np.bincount(outcome.ravel(), minlength=len(counts[side]))
+            dealt = np.cumsum(tables[side].damage[outcome], axis=1, dtype=np.int32)
+            dead = dealt >= life[side][going, None]
+            killed = dead.any(axis=1)
+            # Time of the strike that killed the other one, inf if none did.
+            kills.append(np.where(killed, (made[side] + dead.argmax(axis=1) + 1) * fighter.delay, np.inf))
+            life[side][going] -= dealt[:, -1]
+            made[side] += k
+
+        # On the same tick the first fighter strikes first.
+        over = np.isfinite(kills[0]) | np.isfinite(kills[1])
+        done = going[over]
+        won[done] = kills[0][over] <= kills[1][over]
+        time[done] = np.minimum(kills[0][over], kills[1][over]) / TICK
+        going = going[~over]
+    return won, time
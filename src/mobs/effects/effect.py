@@ -16,6 +16,16 @@ class Effect:
         self.__on_finish = on_finish
         self.__start()
 
+    def reattach(self, owner, on_finish = None):
+        """
+        Register the running effect of a loaded mob, which already carries
+        its modifier.
+        """
+        self.owner = owner
+        self.__on_finish = on_finish
+        self.__enabled = True
+        self.modifier.reattach(owner)
+
     def __start(self):
         assert not self.__enabled
         self.modifier.commit(self.owner)
@@ -6,10 +6,14 @@ class EffectsContainer:
     def add(self, effect):
         if effect in self:
             return
-        effect.register(self.owner, lambda x: self.__on_effect_finished(x))
+        effect.register(self.owner, self.__on_effect_finished)
         self.array.append(effect)
         print(effect)
 
+    def reattach(self, effect):
+        effect.reattach(self.owner, self.__on_effect_finished)
+        self.array.append(effect)
+
     def __on_effect_finished(self, effect):
         self.array.remove(effect)
 
@@ -28,6 +28,7 @@ class Mob(object):
     reflect_damage_bonus = 0
     reflect_chance_bonus = 0
     has_skin = False
+    dormant = False
 
     def __init__(self):
         self.life = Atrib()
@@ -43,6 +44,14 @@ class Mob(object):
         self.is_alive = True
         self.tags: Dict = dict()
 
+    def reschedule(self):
+        """
+        Call after changing `speed` or `dormant`: the scheduler keeps the
+        time of the next action.
+        """
+        if self.map:
+            self.map.scheduler.reschedule(self)
+
     def die(self, damage):
         assert self.is_alive
         self.is_alive = False
@@ -73,10 +82,12 @@ class Mob(object):
         assert self.tile.mob is None
         self.tile.mob = self
         m.mobs.append(self)
+        m.scheduler.add(self)
 
     def remove(self):
         self.tile.mob = None
         self.map.mobs.remove(self)
+        self.map.scheduler.remove(self)
 
     def move(self, x, y):
         self.tile.mob = None
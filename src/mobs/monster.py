@@ -1,6 +1,7 @@
 from .damage import *
 from .mob import *
 from items.items import *
+from common.rng import stream, in_stream
 
 class Monster(Mob, metaclass=Register):
     ALL = []
@@ -17,7 +18,8 @@ class Monster(Mob, metaclass=Register):
 
     def __init__(self):
         super(Monster, self).__init__()
-        self.life.fill()
+        # The class declares the life of its kind; Mob.__init__ replaced it.
+        self.life = Atrib(type(self).life)
 
     def look_like(self, cls):
         self.name = cls.name
@@ -31,10 +33,11 @@ class Monster(Mob, metaclass=Register):
             pass
 
     def die(self, damage):
-        if rand(1, 30) <= self.drop_rate:
-            self.drop()
-        if rand(1, 10) <= 1:
-            self.adv_drop()
+        with stream('loot'):
+            if rand(1, 30) <= self.drop_rate:
+                self.drop()
+            if rand(1, 10) <= 1:
+                self.adv_drop()
         super().die(damage)
         self.look_normal()
         if self.map.is_visible(self.x, self.y):
@@ -47,21 +50,25 @@ class Monster(Mob, metaclass=Register):
         message('The %s disappears!' % self.name)
         self.remove()
 
+    @in_stream('loot')
     def drop(self):
         from mobs.drop import Drop
         d = Drop(self)
         d.drop()
         
+    @in_stream('loot')
     def adv_drop(self):
         from mobs.drop import AdvDrop
         d = AdvDrop(self)
         d.drop()
 
+    @in_stream('loot')
     def rare_drop(self):
         from mobs.drop import RareDrop
         d = RareDrop(self)
         d.drop()
 
+    @in_stream('loot')
     def unique_drop(self):
         from mobs.drop import UniqueDrop
         d = UniqueDrop(self)
@@ -73,7 +80,7 @@ class Monster(Mob, metaclass=Register):
         if player.invisibility != Invisibility.NONE:
             return None
         fov_range = self.fov_range + player.light_range/2
-        if T.map_is_in_fov(self.map.fov_map, self.x, self.y):
+        if self.map.fov[self.x, self.y]:
             d = dist(self.x, self.y, player.x, player.y)
             if d <= fov_range:
                 return d
@@ -84,6 +91,22 @@ class Monster(Mob, metaclass=Register):
         if dirs != []:
             self.walk(*choice(dirs))
 
+    def step_along_flow(self, away=False):
+        """
+        :return: (dx, dy) of the free neighbor cell that brings the monster
+            closest to the player (or farthest if `away`), or None.
+        """
+        field = self.map.flow_field(self.enters_walls)
+        best, step = field[self.x, self.y], None
+        for dx, dy in ALL_DIRS:
+            x, y = self.x + dx, self.y + dy
+            if not self.map.in_map(x, y):
+                continue
+            d = field[x, y]
+            if (d > best if away else d < best) and self.can_walk(dx, dy):
+                best, step = d, (dx, dy)
+        return step
+
     def summon_monsters(self):
         if self.map.is_visible(self.x, self.y):
             message('The %s summons monsters!' % self.name)
@@ -96,7 +119,22 @@ class Monster(Mob, metaclass=Register):
         for dx, dy in dirs:
             n = self.map.flood(self.x+dx, self.y+dy, mcls, n)
 
+    def update_activity(self):
+        player = self.map.player
+        dormant = player is not None and \
+            dist(self.x, self.y, player.x, player.y) > self.map.activity_radius
+        if dormant != self.dormant:
+            self.dormant = dormant
+            self.reschedule()
+        return not dormant
+
+    @in_stream('ai')
     def act(self):
+        # Far from the player a monster skips its AI, regeneration and
+        # effects and just takes a random step now and then.
+        if not self.update_activity():
+            self.walk_randomly()
+            return
         super(Monster, self).act()
         player = self.map.player
         d = self.see_player()
@@ -104,20 +142,20 @@ class Monster(Mob, metaclass=Register):
             if self.summoner and rand(1, 6) == 1:
                 self.summon_monsters()
                 return
-            dx, dy = dir_towards(self.x, self.y,
-                                 player.x, player.y)
             if player.light_range > 0 and self.fears_light:
-                if self.can_walk(-dx, -dy):
-                    self.walk(-dx, -dy)
+                step = self.step_along_flow(away=True)
+                if step:
+                    self.walk(*step)
                 elif player.is_besides(self):
                     self.attack_player()
                 else:
                     self.walk_randomly()
+            elif player.is_besides(self):
+                self.attack_player()
             else:
-                if player.is_besides(self):
-                    self.attack_player()
-                elif self.can_walk(dx, dy):
-                    self.walk(dx, dy)
+                step = self.step_along_flow()
+                if step:
+                    self.walk(*step)
                 else:
                     self.walk_randomly()
         else:
@@ -1,12 +1,34 @@
 from __future__ import annotations
 
-from random import randrange, choice
-from typing import Type
+from bisect import bisect_right
+from typing import Dict, Type, Tuple
 
 from mobs.perks.perk import *
 from utils.random_help import *
 
 
+_index = {}
+
+
+def perk_index(game_class, rarity: PerkRarity | None) -> Tuple[List[int], List[Tuple[ChoiceBox, ...]]]:
+    """
+    :return: the level requirements of the perks a class may learn (of one
+        rarity, or of any for None) in ascending order, and for each the
+        boxes of the perks available from that level on, in Perk.ALL order.
+        Built once for every state of Perk.ALL.
+    """
+    key = (len(Perk.ALL), game_class, rarity)
+    found = _index.get(key)
+    if found is None:
+        perks = [cls for cls in Perk.ALL if (len(cls.classes) == 0 or game_class in cls.classes) and
+                 (rarity is None or cls.rarity == rarity)]
+        requirements = sorted({cls.level_requirement for cls in perks})
+        boxes = [tuple(ChoiceBox(obj=cls, weight=PerksContainer.RARITY_CHANCES[cls.rarity])
+                       for cls in perks if cls.level_requirement <= level) for level in requirements]
+        found = _index[key] = requirements, boxes
+    return found
+
+
 class PerksContainer:
     NEW_PERKS_COUNT = 3
     NEW_PERKS_COUNT_WIZARD = 10
@@ -19,24 +41,47 @@ class PerksContainer:
     def __init__(self, player):
         self.__player = player
         self.__perks = dict()
+        # Perks learned max_count times.
+        self.__maxed = set()
 
-    def generate_new_perks(self) -> List[Perk]:
+    def available(self) -> List[ChoiceBox]:
         import mobs.perks.fighter_perks
         import mobs.perks.perks
-        filtered_by_class = list(filter(lambda x: self.__check_perk(x), Perk.ALL))
-        if self.__player.level % 5 == 0 and self.__player.level != 1:
-            filtered_by_class = list(filter(lambda x: x.rarity == PerkRarity.LEGEND, filtered_by_class))
-        boxes = [ChoiceBox(obj=cls, weight=self.RARITY_CHANCES[cls.rarity]) for cls in filtered_by_class]
-        sample = weighted_sample(boxes, self.NEW_PERKS_COUNT
+        level = self.__player.level
+        rarity = PerkRarity.LEGEND if level % 5 == 0 and level != 1 else None
+        requirements, boxes = perk_index(self.__player.game_class, rarity)
+        i = bisect_right(requirements, level)
+        if i == 0:
+            return []
+        return [box for box in boxes[i - 1] if box.obj.name() not in self.__maxed]
+
+    def generate_new_perks(self) -> List[Perk]:
+        sample = weighted_sample(self.available(), self.NEW_PERKS_COUNT
         if not self.__player.wizard else self.NEW_PERKS_COUNT_WIZARD)
         return [x() for x in sample]
 
     def teach(self, perk: Perk) -> None:
         assert self.__check_perk(perk)
-        current = self.__perks.get(perk.name(), 0)
-        self.__perks[perk.name()] = current + 1
+        current = self.__perks.get(perk.name(), 0) + 1
+        self.__perks[perk.name()] = current
+        if current >= perk.max_count:
+            self.__maxed.add(perk.name())
         perk.use(self.__player)
 
+    def learned(self) -> Dict[str, int]:
+        return dict(self.__perks)
+
+    def restore(self, perk: Type[Perk], count: int) -> None:
+        """
+        Take back a perk of a loaded player, whose attributes already carry
+        its modifier `count` times.
+        """
+        self.__perks[perk.name()] = count
+        if count >= perk.max_count:
+            self.__maxed.add(perk.name())
+        for i in range(count):
+            perk.modifier.reattach(self.__player)
+
     def __check_perk(self, perk: Perk | Type) -> bool:
         current = self.__perks.get(perk.name(), 0)
         return (len(perk.classes) == 0 or self.__player.game_class in perk.classes) and current < perk.max_count and perk.level_requirement <= self.__player.level
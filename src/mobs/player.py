@@ -176,6 +176,12 @@ class Player(Mob):
         self.fov_range += n
         self.map.recalc_fov()
 
+    def update_fov(self):
+        # Equipment may change the sight radius, which the cached
+        # visibility masks of the map depend on.
+        if self.map:
+            self.map.recalc_fov()
+
     def has_equipped(self, item):
         return item.slot and self.equipment[item.slot] == item
 
@@ -229,6 +235,7 @@ class Player(Mob):
         message('You unequip the %s.' % item.descr)
         item.on_unequip(self)
         self.equipment[item.slot] = None
+        self.update_fov()
         self.use_energy()
 
     def equip(self, item):
@@ -238,6 +245,7 @@ class Player(Mob):
                 self.unequip(old_item)
             message('You equip the %s.' % item.descr)
             self.equipment[item.slot] = item
+            self.update_fov()
             self.use_energy()
 
     def attack(self, mon):
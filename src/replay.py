@@ -0,0 +1,27 @@
+"""
+Replays an input journal headlessly, as fast as it runs:
+
+    python replay.py JOURNAL [--until TURN] [--save PATH]
+
+With --save the game is saved where the replay stops, to fast-forward to
+that point and go on playing from there.
+"""
+import argparse
+import time
+
+from common.journal import replay
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay an input journal.')
+    parser.add_argument('journal')
+    parser.add_argument('--until', type=int, help='stop at this turn')
+    parser.add_argument('--save', help='save the game where the replay stops')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    game = replay(args.journal, args.until)
+    elapsed = time.perf_counter() - start
+    print('%d turns in %.2fs (%.0f turns/s)' % (game.turns, elapsed, game.turns / max(elapsed, 1e-9)))
+    if args.save:
+        game.save(args.save)
+        print('Saved to %s' % args.save)
@@ -1,11 +1,80 @@
+"""
+Simulated duels of every class's starting kit against every monster:
+
+    python simulate_fight.py [--duels N] [--class NAME] [--monster NAME] [--seed N] [--json PATH]
+
+For each pair it prints the player's win rate, the median and 90th
+percentile time to kill (in turns) and the mean damage of a strike of each
+side. --json also writes the distributions: time to kill and to die, and
+the damage and outcome of the strikes of each side. See mobs/duel.py for
+what is simulated.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
 from common.game_class import Game
-from mobs.mobs import *
-from mobs.player import *
+from common.rng import reseed, new_seed
+from mobs.duel import duel, fighter, outfit
+from mobs.monster import Monster
+from mobs.player import Player, Classes
+import mobs.mobs
+
+
+QUANTILES = (10, 25, 50, 75, 90, 99)
+
+
+def percentile(values, q):
+    return np.percentile(values, q) if len(values) else float('nan')
+
+
+def distribution(result):
+    return {
+        'duels': result.n,
+        'win_rate': float(result.win_rate),
+        'draws': result.draws,
+        'kill_time': {q: percentile(result.kill_time(), q) for q in QUANTILES},
+        'death_time': {q: percentile(result.kill_time(False), q) for q in QUANTILES},
+        'player_strikes': {'damage': result.damage_histogram(0), 'outcome': result.status_rates(0)},
+        'monster_strikes': {'damage': result.damage_histogram(1), 'outcome': result.status_rates(1)},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate duels between the classes and the monsters.')
+    parser.add_argument('--duels', type=int, default=100000, help='duels per pair')
+    parser.add_argument('--class', dest='game_class', help='only this class')
+    parser.add_argument('--monster', help='only the monsters whose name contains this')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--json', help='write the distributions to this file')
+    args = parser.parse_args()
 
-player = Player(0, Classes.FIGHTER)
-player.blocking += 200
-mob = Bat()
+    seed = new_seed() if args.seed is None else args.seed
+    reseed(seed)  # the weapons of the kits may roll a bonus
+    rng = np.random.default_rng(seed)
+    classes = [Classes[args.game_class.upper()]] if args.game_class else list(Classes)
+    monsters = sorted((cls for cls in Monster.ALL if not args.monster or args.monster.lower() in cls.name.lower()),
+                      key=lambda cls: (cls.level, cls.name))
 
-for i in range(50):
-    # print(Damage.calculate(player, mob))
-    print(Damage.calculate(mob, player))
+    print('%-8s %-20s %3s %7s %7s %7s %7s %7s' % ('class', 'monster', 'lvl', 'win %', 'p50', 'p90', 'dmg', 'taken'))
+    report = {}
+    total, start = 0, time.perf_counter()
+    for game_class in classes:
+        player = fighter(outfit(Player(False, game_class)))
+        for cls in monsters:
+            result = duel(player, fighter(cls()), args.duels, rng)
+            kill_time = result.kill_time()
+            print('%-8s %-20s %3d %6.1f%% %7.1f %7.1f %7.2f %7.2f' % (
+                game_class.name.lower(), cls.name, cls.level, result.win_rate * 100,
+                percentile(kill_time, 50), percentile(kill_time, 90),
+                result.mean_damage(0), result.mean_damage(1)))
+            total += result.n
+            if args.json:
+                report.setdefault(game_class.name.lower(), {})[cls.name] = distribution(result)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1, default=float)
+    print('%d duels in %.1fs (%.0f duels/s)' % (total, elapsed, total / elapsed))
@@ -1,4 +1,6 @@
-from random import randint
+from common.rng import randint, randrange, random
+from bisect import bisect_right
+from itertools import accumulate
 from typing import NamedTuple, List
 
 
@@ -7,30 +9,115 @@ class ChoiceBox(NamedTuple):
     weight: int
 
 
+class WeightedSampler:
+    """
+    Integer weights in a Fenwick tree: a weighted draw, a change of weight
+    and drawing without replacement all take O(log n).
+
+    A draw picks the same index for the same random number as a linear scan
+    of the weights would.
+    """
+
+    def __init__(self, weights: List[int]):
+        self.weights = list(weights)
+        self.size = len(self.weights)
+        # tree[i] holds the weights of (i - lowbit(i), i], built from the prefix sums.
+        prefix = [0, *accumulate(self.weights)]
+        self.tree = [prefix[i] - prefix[i & (i - 1)] for i in range(self.size + 1)]
+        self.total = prefix[-1]
+        self.top = 1 << self.size.bit_length() if self.size else 0
+
+    def update(self, index: int, weight: int) -> None:
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, number: int) -> int:
+        """
+        :return: the index whose weight range holds `number`, counting from
+            0 at the start of the first weight.
+        """
+        i, step = 0, self.top
+        while step:
+            j = i + step
+            if j <= self.size and self.tree[j] <= number:
+                i = j
+                number -= self.tree[j]
+            step >>= 1
+        return i
+
+    def draw(self) -> int:
+        return self.find(randint(0, self.total - 1))
+
+    def draws(self, count: int) -> List[int]:
+        """
+        :return: `count` draws with replacement.
+        """
+        return [self.draw() for i in range(count)]
+
+    def take(self) -> int:
+        """
+        Draw an index and drop its weight, so it is not drawn again.
+        """
+        index = self.draw()
+        self.update(index, 0)
+        return index
+
+    def sample(self, count: int) -> List[int]:
+        """
+        :return: `count` distinct indices, without replacement.
+        """
+        return [self.take() for i in range(count)]
+
+
 '''Analog of random.choice(), but use additional parameter ('weight'), which customize chance of random'''
 
 
 def weighted_choice_int(weights: List[int]) -> int:
-    all_weight = sum(weights)
-    number = randint(0, all_weight - 1)
-    for (i, weight) in enumerate(weights):
-        if number < weight:
-            return i
-        number -= weight
+    # One draw does not pay for a WeightedSampler: bisect the running totals.
+    cumulative = list(accumulate(weights))
+    return bisect_right(cumulative, randint(0, cumulative[-1] - 1))
 
 
 def weighted_choice(boxes: List[ChoiceBox]) -> object:
-    choice_index = weighted_choice_int([box.weight for box in boxes])
-    return boxes[choice_index].obj
+    return boxes[weighted_choice_int([box.weight for box in boxes])].obj
 
 
 def weighted_sample(boxes: List[ChoiceBox], count: int) -> List[object]:  # TODO: check for another versions -> List[object | type]:
     if len(boxes) > count:
-        results = []
-        for i in range(count):
-            choice = boxes[weighted_choice_int([box.weight for box in boxes])]
-            results.append(choice.obj)
-            boxes.remove(choice)
-        return results
+        sampler = WeightedSampler([box.weight for box in boxes])
+        return [boxes[i].obj for i in sampler.sample(count)]
     else:
         return [box.obj for box in boxes]
+
+
+class AliasTable:
+    """
+    Walker's alias method: draws from a fixed discrete distribution in O(1),
+    with two random numbers, after an O(n) setup.
+    """
+
+    def __init__(self, weights: List[float]):
+        n = len(weights)
+        total = sum(weights)
+        if n == 0 or total <= 0:
+            raise ValueError('Nothing to choose from')
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+    def draw(self) -> int:
+        i = randrange(len(self.prob))
+        return i if random() < self.prob[i] else self.alias[i]
@@ -0,0 +1,36 @@
+from common.game_class import Game
+
+import os
+
+import balance
+from common.column_file import ColumnFile
+
+COLUMNS = [('n', 'u4'), ('name', str), ('x', 'f4')]
+
+
+def test_column_file_resumes_after_a_torn_row(tmp_path):
+    path = str(tmp_path / 'table')
+    table = ColumnFile(path, COLUMNS)
+    for i in range(3):
+        table.append({'n': i, 'name': 'even' if i % 2 == 0 else 'odd', 'x': i / 2})
+    table.close()
+    # Interrupted in the middle of the fourth row.
+    with open(os.path.join(path, 'n.bin'), 'ab') as f:
+        f.write(b'\x03\x00\x00\x00')
+
+    table = ColumnFile(path, COLUMNS)
+    assert table.rows == 3
+    table.append({'n': 7, 'name': None, 'x': 1})
+    data = table.read()
+    table.close()
+    assert data['n'].tolist() == [0, 1, 2, 7]
+    assert data['name'].tolist() == ['even', 'odd', 'even', '']
+    assert data['x'].tolist() == [0, 0.5, 1, 1]
+
+
+def test_balance_game_reports_its_stats():
+    row = balance.play((4, 5, 'THIEF', 60))
+    assert row['game'] == 4 and row['game_class'] == 'THIEF'
+    assert 0 < row['turns'] <= 60
+    assert row['outcome'] in (balance.ALIVE, balance.DIED)
+    assert set(row) == {name for name, dtype in balance.COLUMNS}
@@ -0,0 +1,13 @@
+from common.game_class import Game
+
+import benchmark
+
+
+def test_benchmarks_run_and_compare_to_a_baseline(capsys):
+    report = benchmark.run(rounds=1, only='damage')
+    assert report['results']['damage']['median_us'] > 0
+
+    baseline = {'results': {'damage': dict(report['results']['damage'])}}
+    assert benchmark.compare(report, baseline) == []
+    baseline['results']['damage']['median_us'] /= 2
+    assert benchmark.compare(report, baseline) == ['damage']
@@ -0,0 +1,41 @@
+from common.game_class import Game
+
+import numpy as np
+import pytest
+
+from common.rng import reseed
+from mobs.damage import Damage, DamageStatus
+from mobs.duel import Fighter, duel, fighter, outfit, strike_table
+from mobs.mobs import Troll
+from mobs.player import Player, Classes
+
+
+def test_strike_table_matches_damage_calculate():
+    reseed(3)
+    player, troll = outfit(Player(False, Classes.FIGHTER)), Troll()
+    table = strike_table(fighter(troll), fighter(player))
+    assert table.cdf[-1] == 1.0
+
+    n = 20000
+    strikes = [Damage.calculate(troll, player) for i in range(n)]
+    assert np.mean([damage.value for damage in strikes]) == pytest.approx(table.mean, rel=0.05)
+    blocked = sum(damage.status == DamageStatus.BLOCKED for damage in strikes) / n
+    p = np.diff(table.cdf, prepend=0)
+    assert blocked == pytest.approx(p[table.status == DamageStatus.BLOCKED.value].sum(), abs=0.02)
+
+
+def test_duel_times_the_killing_strike():
+    strong = Fighter('strong', 10, (1, 1, 99), 10 ** 6, 1, 0, 0, 60)
+    weak = Fighter('weak', 10, (1, 1, 0), 1, 1, 0, 0, 30)
+    result = duel(strong, weak, 1000, np.random.default_rng(0))
+    assert result.won.all()
+    # The weak one strikes twice as often but cannot kill in time; even a
+    # sure strike misses one time in 21.
+    assert set(result.time) <= {1, 2, 3}
+    assert result.status_rates(0)['evaded'] == pytest.approx(1 / 21, abs=0.01)
+
+
+def test_monsters_start_with_the_life_of_their_kind():
+    troll = Troll()
+    assert troll.life.max == troll.life.cur == Troll.life > 1
+    assert fighter(troll).life == Troll.life
@@ -0,0 +1,36 @@
+from common.game_class import Game
+
+import numpy as np
+
+from maps.generator import MapGenerator, Occupancy, WALL, FLOOR, STAIR_UP
+from common.constants import MAP_W, MAP_H
+
+
+def test_occupancy_counts_rooms():
+    grid = np.full((MAP_W, MAP_H), WALL, dtype=np.uint8)
+    occupancy = Occupancy(grid)
+    generator = MapGenerator()
+    rooms = [room for room in (generator.try_put_room(grid, occupancy, 8, 6) for i in range(200)) if room]
+    assert rooms
+    assert (occupancy.sat == Occupancy(grid).sat).all()
+    for x, y, w, h in rooms:
+        assert occupancy.count(x, y, w, h) == w * h
+    assert occupancy.count(0, 0, MAP_W, MAP_H) == sum(w * h for x, y, w, h in rooms)
+
+
+def test_generated_level():
+    tiles = MapGenerator().generate(1)
+    assert tiles.shape == (MAP_W, MAP_H)
+    assert (tiles.type == STAIR_UP).sum() == 1
+    assert (tiles.type == FLOOR).any()
+
+
+def test_corridors_connect_all_rooms():
+    import tcod as T
+    for level in (1, 5, 10):
+        tiles = MapGenerator().generate(level)
+        x, y = np.argwhere(tiles.walkable)[0]
+        steps = np.full(tiles.shape, np.iinfo(np.int32).max, dtype=np.int32)
+        steps[x, y] = 0
+        T.path.dijkstra2d(steps, tiles.walkable.astype(np.int8), 1, 0, out=steps)
+        assert (steps[tiles.walkable] < np.iinfo(np.int32).max).all()
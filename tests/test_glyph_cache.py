@@ -0,0 +1,31 @@
+import pygame
+import tcod as T
+
+from graphics.glyph_cache import GlyphCache
+
+
+def create_cache(capacity=2):
+    pygame.font.init()
+    return GlyphCache(pygame.font.Font("../assets/fonts/UbuntuMono-R.ttf", 16), capacity)
+
+
+def test_glyph_hits():
+    cache = create_cache()
+    first = cache.render('@', T.white, T.black)
+    assert cache.render('@', (255, 255, 255), (0, 0, 0)) is first
+    assert cache.render('@', T.red, T.black) is not first
+    info = cache.glyph_info()
+    assert (info.hits, info.misses, info.size) == (1, 2, 2)
+    assert info.hit_rate == 1 / 3
+
+
+def test_text_lru():
+    cache = create_cache(capacity=2)
+    first = cache.render('first', T.white, T.black)
+    cache.render('second', T.white, T.black)
+    cache.render('first', T.white, T.black)
+    cache.render('third', T.white, T.black)
+    assert cache.render('first', T.white, T.black) is first
+    cache.render('second', T.white, T.black)
+    assert cache.text_info().size == 2
+    assert cache.text_info().misses == 4
@@ -0,0 +1,55 @@
+from common.game_class import Game
+
+import pygame
+
+from common.bot import BotInput
+from common.input import ScriptedInput
+from mobs.player import Classes
+
+
+def test_bot_plays_headless():
+    game = Game(False, headless=True, input_source=BotInput(max_turns=200), game_class=Classes.FIGHTER)
+    game.play()
+    assert game.turns > 0
+    assert game.player.map is game.map
+
+
+def test_scripted_input_quits_when_keys_run_out():
+    keys = [pygame.K_KP6, pygame.K_KP4, pygame.K_KP8, pygame.K_KP2]
+    game = Game(False, headless=True, input_source=ScriptedInput([pygame.K_RETURN, pygame.K_RETURN] + keys),
+                game_class=Classes.FIGHTER)
+    game.play()
+    assert game.turns <= len(keys)
+
+
+class BurstInput(ScriptedInput):
+    """
+    Returns all the keys of the turn loop from a single poll, like a queue
+    filled during a slow turn.
+    """
+
+    def __init__(self, keys, burst):
+        super().__init__(keys)
+        self.burst = burst
+
+    def poll(self):
+        burst, self.burst = self.burst, []
+        if burst:
+            return burst
+        return super().poll()
+
+
+def test_one_action_per_event():
+    burst = [(True, key) for key in (pygame.K_KP6, pygame.K_KP4, pygame.K_KP6, pygame.K_KP4)]
+    game = Game(False, headless=True, input_source=BurstInput([pygame.K_RETURN, pygame.K_RETURN], burst),
+                game_class=Classes.FIGHTER)
+    walks = []
+    walk = game.do_walk_command
+
+    def do_walk_command(key):
+        walks.append(game.player.action_turns)
+        walk(key)
+    game.do_walk_command = do_walk_command
+    game.play()
+    assert len(walks) == 4
+    assert all(action_turns > 0 for action_turns in walks)
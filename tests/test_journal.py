@@ -0,0 +1,48 @@
+from common.game_class import Game
+
+import os
+
+from common.bot import BotInput
+from common.journal import read_journal, replay
+from mobs.player import Classes
+
+
+def state(game):
+    player, m = game.player, game.map
+    return game.turns, m.level, player.x, player.y, player.life.cur, player.exp, \
+        [(type(mob).__name__, mob.x, mob.y, mob.life.cur) for mob in m.mobs]
+
+
+def test_replayed_journal_repeats_the_game(tmp_path):
+    path = str(tmp_path / 'game.jsonl')
+    recorded = Game(False, headless=True, input_source=BotInput(max_turns=200), game_class=Classes.FIGHTER,
+                    seed=5, journal_path=path)
+    recorded.play()
+
+    header, entries = read_journal(path)
+    assert header['seed'] == 5 and header['game_class'] == 'FIGHTER'
+    assert any(entry.get('cmd') for entry in entries)
+
+    assert state(replay(path)) == state(recorded)
+
+
+def test_replay_stops_at_the_given_turn(tmp_path):
+    path = str(tmp_path / 'game.jsonl')
+    Game(False, headless=True, input_source=BotInput(max_turns=120), game_class=Classes.FIGHTER,
+         seed=6, journal_path=path).play()
+    original = Game(False, headless=True, input_source=BotInput(max_turns=60), game_class=Classes.FIGHTER, seed=6)
+    original.play()
+    assert state(replay(path, until_turn=60)) == state(original)
+
+
+def test_journal_of_a_resumed_game(tmp_path):
+    save, path = str(tmp_path / 'game.sav'), str(tmp_path / 'game.jsonl')
+    Game(False, headless=True, input_source=BotInput(max_turns=30), game_class=Classes.FIGHTER, seed=7,
+         save_path=save).play()
+    assert os.path.exists(save)
+    resumed = Game(False, headless=True, input_source=BotInput(max_turns=100), save_path=save, journal_path=path)
+    resumed.play()
+
+    header, entries = read_journal(path)
+    assert header['save'] == 'game.jsonl.save'
+    assert state(replay(path)) == state(resumed)
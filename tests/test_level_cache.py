@@ -0,0 +1,40 @@
+from common.game_class import Game
+
+import os
+
+from common.rng import reseed, stream
+from maps import level_cache
+from maps.generator import MapGenerator, GENERATOR_VERSION
+from maps.level_cache import LevelCache
+
+
+def generate(level):
+    generator = MapGenerator()
+    with stream('mapgen', level):
+        return generator, generator.generate(level)
+
+
+def test_generator_reuses_cached_level(tmp_path):
+    reseed(3)
+    fresh, tiles = generate(2)
+    level_cache.configure(str(tmp_path))
+    try:
+        reseed(3)
+        generate(2)
+        assert os.listdir(tmp_path) == ['level-3-2-v%d.npz' % GENERATOR_VERSION]
+        reseed(3)
+        cached, cached_tiles = generate(2)
+    finally:
+        level_cache.configure(None)
+    assert (cached_tiles.type == tiles.type).all()
+    assert cached.rooms == fresh.rooms
+
+
+def test_cache_is_bounded(tmp_path):
+    cache = LevelCache(str(tmp_path), max_bytes=10000)
+    generator, tiles = generate(1)
+    for seed in range(20):
+        cache.store(seed, 1, GENERATOR_VERSION, tiles.type, generator.rooms)
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) <= 10000
+    assert cache.load(19, 1, GENERATOR_VERSION) is not None
+    assert cache.load(19, 1, GENERATOR_VERSION + 1) is None
@@ -0,0 +1,99 @@
+from common.game_class import Game
+
+import numpy as np
+import pytest
+
+from common.utils import dist
+from maps.map import Map, UNREACHABLE
+from maps.tile_grid import NoEmptyTile
+from mobs.player import Player, Classes
+
+
+def create_map(level=1):
+    m = Map(level)
+    player = Player(0, Classes.FIGHTER)
+    x, y, _ = m.random_empty_tile()
+    player.put(m, x, y)
+    return m, player
+
+
+def test_visibility_masks():
+    m, player = create_map()
+    visible = m.visible_cells()
+    assert visible[player.x, player.y]
+    assert (m.lit_cells() <= visible).all()
+    for x in range(m.tiles.width):
+        for y in range(m.tiles.height):
+            assert m.is_visible(x, y) == bool(visible[x, y])
+            if m.is_visible(x, y):
+                assert dist(x, y, player.x, player.y) <= player.fov_range + player.radius
+
+
+def test_visibility_follows_light_range():
+    m, player = create_map()
+    before = m.visible_cells().sum()
+    player.change_light_range(4)
+    assert m.visible_cells().sum() >= before
+    assert m.lit_cells().sum() > 0
+
+
+def test_free_cell_index():
+    m, player = create_map()
+    free = m.tiles.free
+    cell = player.x * m.tiles.height + player.y
+    assert cell not in free
+    assert len(free) == (m.tiles.walkable & ~m.tiles.mob & ~m.tiles.obj).sum()
+    x, y = player.x, player.y
+    player.remove()
+    assert cell in free
+    player.put(m, x, y)
+    assert cell not in free
+
+
+def test_random_empty_tile():
+    m, player = create_map()
+    for i in range(100):
+        x, y, tile = m.random_empty_tile(not_seen=True, no_stair=True)
+        assert tile.walkable and not tile.mob and not tile.obj
+        assert not m.is_visible(x, y)
+
+
+def test_random_empty_tile_fails_cleanly():
+    m, player = create_map()
+    with pytest.raises(NoEmptyTile):
+        m.tiles.random_cell(exclude=[~m.tiles.mob])
+
+
+def test_far_monsters_doze(monkeypatch):
+    m, player = create_map()
+    m.do_turn(0)
+    monsters = [mob for mob in m.mobs if mob is not player]
+    for mob in monsters:
+        mob.update_activity()
+        assert mob.dormant == (dist(mob.x, mob.y, player.x, player.y) > m.activity_radius)
+    monkeypatch.setattr('maps.map.ACTIVITY_RADIUS', m.tiles.width + m.tiles.height)
+    m.wake_monsters()
+    assert not any(mob.dormant for mob in monsters)
+
+
+def test_flow_field_leads_to_player():
+    m, player = create_map()
+    field = m.flow_field()
+    assert field[player.x, player.y] == 0
+    assert (field[~m.tiles.walkable] == UNREACHABLE).all()
+    for x, y in zip(*np.nonzero((field > 0) & (field < UNREACHABLE))):
+        around = field[max(x - 1, 0):x + 2, max(y - 1, 0):y + 2]
+        assert around.min() == field[x, y] - 1
+    assert m.flow_field() is field
+    assert (m.flow_field(through_walls=True) < UNREACHABLE).all()
+
+
+def test_speed_modifier_reschedules():
+    from common.modifiers.mod import Mod
+    m, player = create_map()
+    entry = m.scheduler.entries[player]
+    Mod('speed', 2).commit(player)
+    assert m.scheduler.entries[player] != entry
+    entry = m.scheduler.entries[player]
+    player.x = player.x
+    assert m.scheduler.entries[player] == entry
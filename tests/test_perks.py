@@ -9,3 +9,20 @@ def test_perk_name():
     name = Agility.name()
     assert name == 'Agility'
     assert name == perk.name()
+
+
+def test_available_perks_follow_level_class_and_count():
+    from mobs.perks.perk import Perk, PerkRarity
+    from mobs.player import Player, Classes
+    import mobs.perks.fighter_perks
+
+    player = Player(False, Classes.FIGHTER)
+    for level in (1, 3, 5, 6):
+        player.level = level
+        expected = [cls for cls in Perk.ALL if (len(cls.classes) == 0 or Classes.FIGHTER in cls.classes) and
+                    cls.level_requirement <= level and (level != 5 or cls.rarity == PerkRarity.LEGEND)]
+        assert [box.obj for box in player.perks.available()] == expected
+
+    player.level = 6
+    player.perks.teach(Agility())
+    assert Agility not in [box.obj for box in player.perks.available()]
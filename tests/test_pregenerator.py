@@ -0,0 +1,26 @@
+from common.game_class import Game
+
+from common.game import MAX_DLEVEL
+from maps.pregenerator import Pregenerator
+
+
+def test_prepared_level_is_handed_over():
+    levels = Pregenerator()
+    levels.prepare(2)
+    future = levels.pending[2]
+    m = levels.take(2)
+    assert m is future.result()
+    assert m.level == 2 and m.player is None
+    assert not levels.pending
+    levels.shutdown()
+
+
+def test_unprepared_level_is_built_on_demand():
+    levels = Pregenerator(background=False)
+    levels.prepare(2)
+    assert not levels.pending
+    assert levels.take(2).level == 2
+    levels = Pregenerator()
+    levels.prepare(MAX_DLEVEL + 1)
+    assert not levels.pending
+    levels.shutdown()
@@ -0,0 +1,47 @@
+from common.game_class import Game
+
+import json
+
+from common.bot import BotInput
+from common.profiler import PROFILER
+from maps.map import Map
+from mobs.player import Classes
+
+
+def test_profiler_times_the_turn_and_restores_the_originals(tmp_path):
+    do_turn = Map.do_turn
+    PROFILER.enable()
+    try:
+        assert Map.do_turn is not do_turn
+        Game(False, headless=True, input_source=BotInput(max_turns=50), game_class=Classes.FIGHTER, seed=8).play()
+    finally:
+        PROFILER.disable()
+    assert Map.do_turn is do_turn
+
+    report = PROFILER.report()
+    assert report['Map.do_turn']['count'] > 0
+    assert report['MapGenerator.generate']['count'] >= 1
+    # Every mob is timed under its own class.
+    assert report['Player.act']['count'] > 0
+    assert any(name.endswith('.act') and name != 'Player.act' for name in report)
+    assert 'Map.do_turn;Player.act' in PROFILER.folded()
+
+    PROFILER.dump(str(tmp_path / 'profile'))
+    assert json.loads((tmp_path / 'profile.json').read_text()) == report
+    PROFILER.clear()
+
+
+def test_disable_restores_modules_imported_meanwhile(tmp_path, monkeypatch):
+    import importlib
+    import common.game
+    draw_all = common.game.draw_all
+    (tmp_path / 'late_module.py').write_text('from common.game import draw_all\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    PROFILER.enable()
+    try:
+        late_module = importlib.import_module('late_module')
+        assert late_module.draw_all is not draw_all
+    finally:
+        PROFILER.disable()
+    assert late_module.draw_all is draw_all
+    assert common.game.draw_all is draw_all
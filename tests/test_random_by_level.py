@@ -0,0 +1,64 @@
+from common.game_class import Game
+
+from collections import Counter
+from itertools import product
+
+import pytest
+
+from common.rng import reseed
+from common.utils import level_weights, random_by_level
+from utils.random_help import AliasTable
+
+
+def kind(name, common, rarity, dungeons=(1, 3)):
+    return type(name, (), {'common': common, 'rarity': rarity, 'dungeons': dungeons})
+
+
+KINDS = [kind('a', 10, 1), kind('b', 5, 1), kind('c', 10, 5), kind('d', 3, 10), kind('e', 7, 3),
+         kind('f', 10, 1, (4, 6))]
+
+
+def subset_weights(level, items):
+    # Every set of items that can take part in the draw, with its chance.
+    items = [a for a in items if a.dungeons[0] <= level <= a.dungeons[1]]
+    weights = Counter()
+    for taking_part in product(*[(True, False) if a.rarity > 1 else (True,) for a in items]):
+        chance, chosen = 1.0, []
+        for a, part in zip(items, taking_part):
+            if a.rarity > 1:
+                chance *= 1 / a.rarity if part else 1 - 1 / a.rarity
+            if part:
+                chosen.append(a)
+        total = sum(a.common for a in chosen)
+        for a in chosen:
+            weights[a] += chance * a.common / total
+    return items, [weights[a] for a in items]
+
+
+def test_level_weights_are_exact():
+    found, weights = level_weights(2, KINDS)
+    expected_found, expected = subset_weights(2, KINDS)
+    assert found == expected_found
+    assert weights == pytest.approx(expected)
+    assert sum(weights) == pytest.approx(1)
+
+
+def test_random_by_level_follows_the_original_distribution():
+    reseed(11)
+    n = 40000
+    found, weights = level_weights(2, KINDS)
+    counts = Counter(random_by_level(2, KINDS) for i in range(n))
+    assert set(counts) <= set(found)
+    # Pearson's chi-squared, 4 degrees of freedom: 18.5 is its 0.1% quantile.
+    chi2 = sum((counts[a] - n * w) ** 2 / (n * w) for a, w in zip(found, weights))
+    assert chi2 < 18.5
+
+
+def test_alias_table_draws_in_proportion():
+    reseed(12)
+    table = AliasTable([1, 0, 3, 6])
+    n = 30000
+    counts = Counter(table.draw() for i in range(n))
+    assert counts[1] == 0
+    for i, p in ((0, 0.1), (2, 0.3), (3, 0.6)):
+        assert counts[i] / n == pytest.approx(p, abs=0.015)
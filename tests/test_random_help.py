@@ -0,0 +1,59 @@
+from common.game_class import Game
+
+from collections import Counter
+
+import pytest
+
+from common.rng import reseed, randint
+from utils.random_help import ChoiceBox, WeightedSampler, weighted_sample
+
+WEIGHTS = [3, 0, 1, 8, 0, 4, 2]
+
+
+def scan(weights, number):
+    for i, weight in enumerate(weights):
+        if number < weight:
+            return i
+        number -= weight
+
+
+def test_sampler_finds_what_a_linear_scan_finds():
+    sampler = WeightedSampler(WEIGHTS)
+    assert sampler.total == sum(WEIGHTS)
+    assert [sampler.find(n) for n in range(sum(WEIGHTS))] == [scan(WEIGHTS, n) for n in range(sum(WEIGHTS))]
+    sampler.update(3, 0)
+    sampler.update(1, 5)
+    weights = [3, 5, 1, 0, 0, 4, 2]
+    assert [sampler.find(n) for n in range(sum(weights))] == [scan(weights, n) for n in range(sum(weights))]
+
+
+def test_sample_draws_without_replacement():
+    reseed(21)
+    for i in range(200):
+        chosen = WeightedSampler(WEIGHTS).sample(5)
+        assert len(set(chosen)) == 5
+        assert 1 not in chosen and 4 not in chosen
+
+
+def test_weighted_sample_matches_the_sequential_draws():
+    boxes = [ChoiceBox(i, weight) for i, weight in enumerate(WEIGHTS)]
+    reseed(22)
+    expected = []
+    for i in range(100):
+        left, picked = list(boxes), []
+        for j in range(3):
+            box = left[scan([b.weight for b in left], randint(0, sum(b.weight for b in left) - 1))]
+            picked.append(box.obj)
+            left.remove(box)
+        expected.append(picked)
+    reseed(22)
+    assert [weighted_sample(boxes, 3) for i in range(100)] == expected
+    assert len(boxes) == len(WEIGHTS)
+
+
+def test_draws_in_proportion():
+    reseed(23)
+    n = 30000
+    counts = Counter(WeightedSampler(WEIGHTS).draws(n))
+    for i, weight in enumerate(WEIGHTS):
+        assert counts[i] / n == pytest.approx(weight / sum(WEIGHTS), abs=0.015)
@@ -0,0 +1,40 @@
+from common.game_class import Game
+
+import common.game
+from common.bot import BotInput
+from common.rng import reseed, stream, randrange, choice
+from maps.map import Map
+from mobs.player import Classes
+
+
+def test_streams_are_independent():
+    reseed(7)
+    with stream('combat'):
+        first = [randrange(1000) for i in range(5)]
+    reseed(7)
+    with stream('ai'):
+        choice(range(10))
+    with stream('combat'):
+        assert [randrange(1000) for i in range(5)] == first
+
+
+def test_level_depends_on_seed_only():
+    reseed(42)
+    m = Map(3)
+    randrange(1000)
+    reseed(42)
+    randrange(1000)
+    other = Map(3)
+    assert (m.tiles.type == other.tiles.type).all()
+    assert [(type(mob), mob.x, mob.y) for mob in m.mobs] == [(type(mob), mob.x, mob.y) for mob in other.mobs]
+
+
+def play(seed):
+    game = Game(False, headless=True, input_source=BotInput(max_turns=300), game_class=Classes.FIGHTER, seed=seed)
+    game.play()
+    return game.map.level, game.player.x, game.player.y, game.player.life.cur, game.player.exp, \
+        [line for latest, line, color in common.game.MESSAGES]
+
+
+def test_seeded_games_repeat():
+    assert play(1234) == play(1234)
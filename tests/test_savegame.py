@@ -0,0 +1,97 @@
+from common.game_class import Game
+
+import numpy as np
+import pytest
+
+from common.bot import BotInput
+from common.savegame import dumps, loads, read_file, SaveError
+from mobs.player import Classes
+
+
+def new_game(max_turns, save_path=None):
+    return Game(False, headless=True, input_source=BotInput(max_turns=max_turns), game_class=Classes.FIGHTER,
+                seed=7, save_path=save_path)
+
+
+def state(game):
+    player, m = game.player, game.map
+    return game.turns, m.level, player.x, player.y, player.life.cur, player.exp, \
+        [(type(mob).__name__, mob.x, mob.y, mob.life.cur) for mob in m.mobs], m.tiles.known_char.tobytes()
+
+
+def test_values_round_trip():
+    value = {'a': (None, True, 2 ** 70, -1.5, 'text', b'raw'), 'b': [1, [2]], (3, 'key'): {},
+             'grid': np.arange(6, dtype=np.uint8).reshape(2, 3)}
+    copy = loads(dumps(value))
+    assert copy['a'] == value['a'] and copy['b'] == value['b'] and copy[3, 'key'] == {}
+    assert (copy['grid'] == value['grid']).all()
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(SaveError):
+        loads(b'not a save game')
+    for value in (lambda: None, Classes.FIGHTER, np.array([None])):
+        with pytest.raises(SaveError):
+            dumps(value)
+
+
+def test_loaded_map_rebuilds_what_is_not_saved(tmp_path):
+    path = str(tmp_path / 'game.sav')
+    first = new_game(50)
+    first.play()
+    first.save(path)
+    saved = read_file(path)['map']
+    assert set(saved) == {'level', 'types', 'known_char', 'known_color', 'objs', 'items', 'mobs', 'now',
+                          'timetable'}
+
+    loaded = new_game(0)
+    loaded.load(path)
+    m, tiles = loaded.map, loaded.map.tiles
+    free = tiles.walkable & ~tiles.mob & ~tiles.obj
+    assert sorted(tiles.free.as_array()) == list(np.flatnonzero(free))
+    assert (m.fov == first.map.fov).all() and (m.visible == first.map.visible).all()
+    assert [(type(mob).__name__, time) for mob, time, last in m.scheduler.timetable()] == \
+        [(type(mob).__name__, time) for mob, time, last in first.map.scheduler.timetable()]
+    assert [item.descr for item in loaded.player.items] == [item.descr for item in first.player.items]
+    loaded.levels.shutdown()
+
+
+def test_loaded_game_plays_on_like_the_original(tmp_path):
+    path = str(tmp_path / 'game.sav')
+    first = new_game(60)
+    first.play()
+    assert first.player.is_alive
+    first.save(path)
+
+    resumed = new_game(300, save_path=path)
+    resumed.play()
+    original = new_game(300)
+    original.play()
+    assert state(resumed) == state(original)
+    assert resumed.player.on_die.subscribers
+
+
+class ClosingInput(BotInput):
+    """
+    The bot, until the window is closed at a given turn.
+    """
+
+    def __init__(self, close_at):
+        super().__init__()
+        self.close_at = close_at
+
+    def next_key(self):
+        import common.game
+        if common.game.GAME.turns >= self.close_at:
+            raise common.game.WindowClosed()
+        return super().next_key()
+
+
+def test_closing_the_window_keeps_the_game(tmp_path):
+    from common.savegame import read_file
+    path = str(tmp_path / 'game.sav')
+    game = Game(False, headless=True, input_source=ClosingInput(30), game_class=Classes.FIGHTER, seed=7,
+                save_path=path)
+    game.play()
+    assert game.player.is_alive
+    assert read_file(path)['turns'] == game.turns == 30
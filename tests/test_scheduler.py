@@ -0,0 +1,64 @@
+from common.game_class import Game
+
+from maps.scheduler import Scheduler, action_delay, TICK
+from common.game import MIN_SPEED, MAX_SPEED
+from common.constants import DORMANT_SLOWDOWN
+
+
+class Actor(object):
+    dormant = False
+
+    def __init__(self, speed):
+        self.speed = speed
+
+
+def count_actions(scheduler, ticks):
+    counts = {}
+    for t in range(ticks):
+        for mob in scheduler.due(t):
+            counts[mob] = counts.get(mob, 0) + 1
+    return counts
+
+
+def test_action_rate_follows_speed():
+    scheduler = Scheduler()
+    actors = [Actor(speed) for speed in range(MIN_SPEED, MAX_SPEED + 1)]
+    for actor in actors:
+        scheduler.add(actor)
+    ticks = 600
+    counts = count_actions(scheduler, ticks)
+    for actor in actors:
+        assert abs(counts[actor] - ticks * TICK / action_delay(actor.speed)) <= 1
+    assert counts[actors[0]] == ticks // 2
+    assert counts[actors[-1]] == ticks * 2
+
+
+def test_removed_mob_does_not_act():
+    scheduler = Scheduler()
+    a, b = Actor(0), Actor(0)
+    scheduler.add(a)
+    scheduler.add(b)
+    scheduler.remove(a)
+    assert count_actions(scheduler, 10) == {b: 10}
+
+
+def test_speed_change_reschedules():
+    scheduler = Scheduler()
+    actor = Actor(MAX_SPEED)
+    scheduler.add(actor)
+    count_actions(scheduler, 10)
+    actor.speed = MIN_SPEED
+    scheduler.reschedule(actor)
+    actions = [t for t in range(10, 20) for _ in scheduler.due(t)]
+    assert len(actions) == 5
+
+
+def test_dormant_mob_acts_less():
+    scheduler = Scheduler()
+    awake, dormant = Actor(0), Actor(0)
+    dormant.dormant = True
+    scheduler.add(awake)
+    scheduler.add(dormant)
+    counts = count_actions(scheduler, 40)
+    assert counts[awake] == 40
+    assert counts[dormant] == 40 // DORMANT_SLOWDOWN
@@ -0,0 +1,68 @@
+from common.game_class import Game
+
+import numpy as np
+
+from items.light_sources import Torch
+from maps.tile_grid import TileGrid, type_id
+from maps.tiles import FloorTile, WallTile, StairUpTile
+from mobs.mobs import Rat
+
+
+def create_grid():
+    table = {'.': FloorTile, '#': WallTile, '<': StairUpTile}
+    return TileGrid.from_chars(['###', '#.#', '#<#', '#.#'], table)
+
+
+def test_tile_views():
+    grid = create_grid()
+    assert grid.shape == (4, 3)
+    assert isinstance(grid[1][1], FloorTile)
+    assert isinstance(grid[0][0], WallTile)
+    assert grid[1][1] == grid.tile(1, 1)
+    assert grid[1][1].walkable and not grid[0][1].walkable
+    assert grid.walkable.sum() == 3
+
+
+def test_occupancy_arrays():
+    grid = create_grid()
+    rat = Rat()
+    grid[1][1].mob = rat
+    assert grid[1][1].mob is rat
+    assert grid.mob[1, 1]
+    grid[1][1].mob = None
+    assert not grid.mob.any()
+
+    torch = Torch()
+    grid[3][1].items.append(torch)
+    assert grid.item_count[3, 1] == 1
+    grid[3][1].items.remove(torch)
+    assert grid.item_count[3, 1] == 0
+
+
+def test_remember():
+    grid = create_grid()
+    grid[3][1].items.append(Torch())
+    mask = np.zeros(grid.shape, dtype=bool)
+    mask[1:, 1] = True
+    grid.remember(mask)
+    assert grid[1][1].known_glyph[0] == FloorTile.glyph[0]
+    assert grid[2][1].known_glyph[0] == StairUpTile.glyph[0]
+    assert grid[3][1].known_glyph[0] == Torch.glyph[0]
+    assert grid[0][0].known_glyph[0] == ' '
+
+
+def test_find():
+    grid = create_grid()
+    assert grid.find(StairUpTile) == (2, 1)
+    assert grid.type[2, 1] == type_id(StairUpTile)
+
+
+def test_empty_cells_keep_no_item_list():
+    grid = create_grid()
+    assert grid[1][1].items == []
+    assert grid.items == {}
+    torch = Torch()
+    grid[1][1].items.append(torch)
+    assert grid.items[1, 1] == [torch] and grid.item_count[1, 1] == 1
+    grid[1][1].items.remove(torch)
+    assert grid.items == {} and grid.item_count[1, 1] == 0
@@ -0,0 +1,22 @@
+import pygame
+import tcod as T
+
+from graphics.window import Window, get_scr
+
+
+def create_window():
+    pygame.init()
+    return Window(10, 4, pygame.font.Font("../assets/fonts/UbuntuMono-R.ttf", 16))
+
+
+def test_direct_drawing_survives_refresh():
+    window = create_window()
+    window.out(1, 1, 'x')
+    get_scr().fill(T.green, pygame.Rect(0, 0, 2, 2))
+    window.refresh()
+    assert tuple(window.screen.get_at((0, 0)))[:3] == tuple(T.green)
+
+    # The next frame repaints every cell over it.
+    window.clear()
+    window.refresh()
+    assert tuple(window.screen.get_at((0, 0)))[:3] == tuple(T.black)